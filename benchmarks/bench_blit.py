@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精灵 blit 性能测试
+对比转换显示格式前后、裁掉透明边前后，每帧 blit 一个精灵的耗时
+用法: python benchmarks/bench_blit.py
+"""
+import os
+import sys
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
+
+import pygame
+
+from image_character import ImageCharacter
+from src.character_generator import LuotianyiCharacter
+from sprite_atlas import trim_frame
+
+STATES = ["idle", "walk", "sit", "sleep", "happy", "surprise"]
+
+
+def surfaces(character):
+    """ImageCharacter 返回 SpriteFrame，LuotianyiCharacter 返回完整画布的 Surface"""
+    sprites = [character.get_sprite(state) for state in STATES]
+    return [getattr(sprite, "surface", sprite) for sprite in sprites]
+
+
+def time_blits(screen, sprites, number=500):
+    def blit_all():
+        for sprite in sprites:
+            screen.blit(sprite, (0, 60))
+
+    return timeit.timeit(blit_all, number=number) / (number * len(sprites)) * 1e6
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((200, 340), pygame.NOFRAME | pygame.SRCALPHA)
+
+    image_dir = os.path.join(ROOT, "images")
+    character = ImageCharacter(image_dir, 200, 280)
+    before = time_blits(screen, surfaces(character))
+    character.finalize_sprites()
+    after_alpha = time_blits(screen, surfaces(character))
+    character = ImageCharacter(image_dir, 200, 280)
+    character.finalize_sprites((1, 1, 1))
+    after_colorkey = time_blits(screen, surfaces(character))
+
+    print("ImageCharacter (200x280):")
+    print(f"  未转换           {before:8.2f} us/blit")
+    print(f"  convert_alpha    {after_alpha:8.2f} us/blit")
+    print(f"  预合成 colorkey  {after_colorkey:8.2f} us/blit")
+
+    character = LuotianyiCharacter(200)
+    before = time_blits(screen, surfaces(character))
+    character.finalize_sprites()
+    after = time_blits(screen, surfaces(character))
+    trimmed = [trim_frame(surface).surface for surface in surfaces(character)]
+    after_trim = time_blits(screen, trimmed)
+    full_pixels = sum(s.get_width() * s.get_height() for s in surfaces(character))
+    trim_pixels = sum(s.get_width() * s.get_height() for s in trimmed)
+    print("LuotianyiCharacter (200x200):")
+    print(f"  未转换           {before:8.2f} us/blit")
+    print(f"  convert_alpha    {after:8.2f} us/blit")
+    print(
+        f"  裁掉透明边       {after_trim:8.2f} us/blit"
+        f"  (像素 {trim_pixels / full_pixels:.0%})"
+    )
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
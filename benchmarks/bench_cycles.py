@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+矢量角色循环动画生成测试
+对不同的周期帧数，比较在当前进程里光栅化和用进程池并行光栅化各帧用到的层的耗时，
+以及完整画布的各帧和裁剪后打包进图集的帧各占多少内存
+用法: python benchmarks/bench_cycles.py [尺寸]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import pygame
+
+from src import vector_cache
+from src.character_generator import LuotianyiCharacter
+from src.display_list import rasterize_all
+from src.sprite_atlas import SpriteAtlas, trim_frame
+
+FRAME_COUNTS = [4, 8, 16, 32]
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pygame.init()
+    cores = os.cpu_count() or 1
+    print(f"循环动画 walk + idle + sleep，尺寸 {size}，CPU 核数 {cores}")
+
+    # 不动用户目录下的缓存
+    cache_dir = tempfile.TemporaryDirectory()
+    vector_cache._vector_cache = vector_cache.VectorSpriteCache(cache_dir.name)
+
+    for count in FRAME_COUNTS:
+        cycles = {"walk": count, "idle": count, "sleep": count}
+        character = LuotianyiCharacter(size, cycles)
+        frames, layers = character.display_lists()
+        names = [name for name in frames if "." in name]
+        # 各帧用到的层，相同的只画一次
+        digests = list(dict.fromkeys(d for name in names for d in frames[name]))
+        cycle_lists = [layers[digest][1] for digest in digests]
+
+        start = time.perf_counter()
+        rasterize_all(cycle_lists, size, workers=0)
+        inline = time.perf_counter() - start
+        start = time.perf_counter()
+        rasterize_all(cycle_lists, size, workers=cores)
+        pooled = time.perf_counter() - start
+
+        surfaces = [surface for state in cycles for surface in character.frames[state]]
+        full_bytes = sum(s.get_width() * s.get_height() * 4 for s in surfaces)
+        atlas = SpriteAtlas(
+            {name: trim_frame(surface) for name, surface in zip(names, surfaces)}
+        )
+        atlas_bytes = atlas.surface.get_width() * atlas.surface.get_height() * 4
+
+        print(
+            f"  {len(names):>3} 帧 {len(digests):>3} 层: 单进程 {inline * 1000:7.1f}ms  "
+            f"进程池 {pooled * 1000:7.1f}ms  "
+            f"内存/帧 完整画布 {full_bytes / len(names) / 1024:6.1f}KB  "
+            f"图集 {atlas_bytes / len(names) / 1024:6.1f}KB"
+        )
+
+    cache_dir.cleanup()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
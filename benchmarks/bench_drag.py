@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拖拽合并测试
+用计数的假后端模拟高回报率鼠标，同一串事件分别交给原来的逐事件处理和 DragController，
+统计光标读取和窗口移动次数（行为的正确性见 tests/test_drag_controller.py）
+用法: python benchmarks/bench_drag.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from drag_controller import DragController
+
+
+class CountingBackend:
+    """不调用系统 API，只记录调用次数"""
+
+    def __init__(self):
+        self.cursor = (500, 500)
+        self.cursor_reads = 0
+        self.moves = []
+
+    def get_cursor_pos(self):
+        self.cursor_reads += 1
+        return self.cursor
+
+    def move_window(self, x, y):
+        self.moves.append((x, y))
+
+
+class PerEventDrag:
+    """原来的写法：每个 MOUSEMOTION 都读一次光标、移动一次窗口"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.motion_events = 0
+        self.skipped_moves = 0
+
+    def start(self, x, y, max_x, max_y):
+        self._cursor = self.backend.get_cursor_pos()
+        self._x, self._y = x, y
+        self._max_x, self._max_y = max_x, max_y
+
+    def motion(self):
+        self.motion_events += 1
+        cur_x, cur_y = self.backend.get_cursor_pos()
+        self._x = max(0, min(self._x + cur_x - self._cursor[0], self._max_x))
+        self._y = max(0, min(self._y + cur_y - self._cursor[1], self._max_y))
+        self._cursor = (cur_x, cur_y)
+        self.backend.move_window(int(self._x), int(self._y))
+
+    def flush(self, now):
+        return None
+
+
+def simulate(events_per_frame, per_event=False, frames=120, speed=600):
+    """光标以 speed 像素/秒匀速移动，每隔几帧停下来手抖一下"""
+    backend = CountingBackend()
+    if per_event:
+        drag = PerEventDrag(backend)
+    else:
+        drag = DragController(backend, refresh_rate=60)
+    drag.start(100, 100, 1920, 1080)
+
+    x = float(backend.cursor[0])
+    step = speed / 60 / events_per_frame
+    for frame in range(frames):
+        for i in range(events_per_frame):
+            if frame % 4 == 0:
+                # 手抖：光标来回移动，帧末位置不变
+                x += step if i % 2 == 0 else -step
+            else:
+                x += step
+            backend.cursor = (int(x), backend.cursor[1])
+            drag.motion()
+        drag.flush(frame * 1000 // 60)
+
+    return drag, backend
+
+
+def main():
+    print(
+        f"{'events/frame':>12} {'motion':>8} {'old reads':>10} {'old moves':>10} "
+        f"{'cursor reads':>13} {'moves':>6} {'skipped':>8}"
+    )
+    for events_per_frame in (1, 4, 16, 133):
+        _, old = simulate(events_per_frame, per_event=True)
+        drag, backend = simulate(events_per_frame)
+        # 减去 start() 里的那一次读取
+        print(
+            f"{events_per_frame:>12} {drag.motion_events:>8} "
+            f"{old.cursor_reads - 1:>10} {len(old.moves):>10} "
+            f"{backend.cursor_reads - 1:>13} {len(backend.moves):>6} "
+            f"{drag.skipped_moves:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+空闲开销测试
+在无窗口平台上运行完整的 事件 → 更新 → 绘制 循环，统计唤醒次数、提交帧数和 CPU 时间
+用法: python benchmarks/bench_idle.py [秒数] [image|procedural]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("LUOTIANYI_PLATFORM", "headless")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+
+def create_pet(kind):
+    if kind == "procedural":
+        from src.desktop_pet import DesktopPet
+
+        return DesktopPet()
+
+    from desktop_pet_image import DesktopPetImage
+
+    return DesktopPetImage(use_animation=False)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    kind = sys.argv[2] if len(sys.argv) > 2 else "image"
+
+    os.chdir(ROOT)
+    pet = create_pet(kind)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    frames = 0
+    while time.perf_counter() - wall_start < seconds:
+        events = pet.scheduler.wait(pet.is_active(), pet.next_deadlines())
+        pet.handle_events(events)
+        pet.update_state()
+        pet.draw()
+        frames += 1
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    renderer = pet.renderer
+    print(f"平台: {pet.platform.name}  角色: {kind}  时长: {wall:.1f}s")
+    print(f"  循环次数     {frames} ({frames / wall:.1f}/s)")
+    print(f"  唤醒/分钟    {pet.scheduler.wakeups_per_minute()}")
+    print(f"  提交帧       {renderer.presented_frames}")
+    print(f"  跳过帧       {renderer.skipped_frames}")
+    print(f"  CPU 时间     {cpu:.2f}s ({cpu / wall * 100:.1f}%)")
+    print(f"  窗口移动     {len(pet.platform.moves)}")
+
+    import pygame
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
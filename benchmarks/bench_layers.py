@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+矢量角色分层合成测试
+登记若干套换了颜色的服装和发型，生成所有 服装 × 发型 组合的全部状态和循环帧，
+比较分层缓存（只光栅化没见过的层，再逐帧叠起来）和每个组合的每一帧都整张重画的耗时
+用法: python benchmarks/bench_layers.py [服装数] [发型数]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import pygame
+
+from src import vector_cache
+from src.character_generator import DESIGN_SIZE, LuotianyiCharacter
+from src.display_list import DisplayList, rasterize_all
+
+SIZE = 200
+
+
+class Tinted:
+    """转发绘图调用，把填充色换成另一种颜色"""
+
+    def __init__(self, draw, shift):
+        self.draw = draw
+        self.shift = shift
+
+    def __getattr__(self, name):
+        def call(xy, fill=None, **kwargs):
+            fill = tuple((c + self.shift) % 256 for c in fill)
+            getattr(self.draw, name)(xy, fill=fill, **kwargs)
+
+        return call
+
+
+def tinted(method, shift):
+    def draw(self, draw, x, y, sway=0):
+        method(self, Tinted(draw, shift), x, y, sway=sway)
+
+    return draw
+
+
+def wardrobe(outfits, hairstyles):
+    """登记了 outfits 套服装、hairstyles 种发型的角色类"""
+    attrs = {"OUTFITS": {}, "HAIRSTYLES": {}, "_display_lists": {}}
+    for i in range(outfits):
+        attrs[f"draw_outfit_{i}"] = tinted(LuotianyiCharacter.draw_clothes, 40 * i)
+        attrs["OUTFITS"][f"outfit{i}"] = f"draw_outfit_{i}"
+    for i in range(hairstyles):
+        attrs[f"draw_hair_{i}"] = tinted(LuotianyiCharacter.draw_hair, 60 * i)
+        attrs["HAIRSTYLES"][f"hair{i}"] = f"draw_hair_{i}"
+    return type("Wardrobe", (LuotianyiCharacter,), attrs)
+
+
+def main():
+    outfits = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    hairstyles = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    pygame.init()
+    cls = wardrobe(outfits, hairstyles)
+    combos = [(o, h) for o in cls.OUTFITS for h in cls.HAIRSTYLES]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = vector_cache.VectorSpriteCache(cache_dir, maxsize=10000)
+        vector_cache._vector_cache = cache
+
+        start = time.perf_counter()
+        character = cls(SIZE, outfit=combos[0][0], hairstyle=combos[0][1])
+        for outfit, hairstyle in combos[1:]:
+            character.dress_up(outfit, hairstyle)
+        layered = time.perf_counter() - start
+        rasterized = cache.misses
+
+        # 对照：每个组合的每一帧都把各层指令合在一起整张光栅化
+        flat_lists = []
+        for outfit, hairstyle in combos:
+            character.outfit, character.hairstyle = outfit, hairstyle
+            frames, layers = character.display_lists()
+            for digests in frames.values():
+                flat = DisplayList(DESIGN_SIZE)
+                for digest in digests:
+                    flat.ops.extend(layers[digest][1].ops)
+                flat_lists.append(flat)
+        start = time.perf_counter()
+        rasterize_all(flat_lists, SIZE, workers=0)
+        flat_time = time.perf_counter() - start
+
+    print(
+        f"{outfits} 套服装 × {hairstyles} 种发型 = {len(combos)} 个组合，"
+        f"共 {len(flat_lists)} 帧，尺寸 {SIZE}"
+    )
+    print(f"  分层缓存  光栅化 {rasterized:>5} 层  {layered * 1000:8.1f}ms（含合成）")
+    print(f"  整张重画  光栅化 {len(flat_lists):>5} 帧  {flat_time * 1000:8.1f}ms")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
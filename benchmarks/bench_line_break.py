@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+换行性能测试
+对比 text_layout.break_lines 与两个桌宠原来的换行实现
+用法: python benchmarks/bench_line_break.py
+"""
+import os
+import sys
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import pygame
+
+from font_manager import get_font_manager
+from text_layout import break_lines, wrap_text
+
+
+def wrap_by_words(text, font, max_width):
+    """DesktopPet 原来的实现：按空格断词"""
+    lines = []
+    current_line = ""
+    for word in text.split():
+        test_line = current_line + word + " "
+        if font.size(test_line)[0] <= max_width:
+            current_line = test_line
+        else:
+            lines.append(current_line)
+            current_line = word + " "
+    if current_line:
+        lines.append(current_line)
+    return lines
+
+
+def wrap_by_chars(text, font, max_width):
+    """DesktopPetImage 原来的实现：逐字测量不断变长的前缀"""
+    lines = []
+    current_line = ""
+    for char in text:
+        test_line = current_line + char
+        if font.size(test_line)[0] <= max_width:
+            current_line = test_line
+        else:
+            lines.append(current_line)
+            current_line = char
+    if current_line:
+        lines.append(current_line)
+    return lines
+
+
+DIALOGS = [
+    "你好呀！我是洛天依~今天天气真好呢，要不要一起出去走走？记得多喝水，注意休息哦！" * 4,
+    "Hello, I am Luo Tianyi! Would you like to hear me sing a song today? " * 4,
+    "🕐 10月18日 星期六 21:30，夜深了，早点睡觉哦~ Good night and sweet dreams!" * 4,
+]
+
+
+def main():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    font = get_font_manager().get(14)
+    max_width = 180
+    number = 200
+
+    print(f"{'text':>6} {'chars':>6} {'words':>10} {'chars(old)':>12} {'break_lines':>12} {'wrap_text':>10}")
+    for i, text in enumerate(DIALOGS):
+        results = []
+        for func in (wrap_by_words, wrap_by_chars, break_lines, wrap_text):
+            seconds = timeit.timeit(lambda: func(text, font, max_width), number=number)
+            results.append(seconds / number * 1e6)
+        print(
+            f"{i:>6} {len(text):>6} {results[0]:>8.1f}us {results[1]:>10.1f}us "
+            f"{results[2]:>10.1f}us {results[3]:>8.1f}us"
+        )
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+换色测试
+用 images/ 里的图片拼出一个多帧的状态，比较三种生成换色变体的方式：
+逐像素用 colorsys 转色相（只测一帧）、每帧单独做一次 NumPy 处理、
+所有帧拼在一起只做一次，以及变体缓存命中时的耗时和每组变体占用的内存
+用法: python benchmarks/bench_palette.py [帧数] [配色名]
+"""
+import colorsys
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import pygame
+
+from image_character import ImageCharacter
+from palette_swap import PALETTES, VariantCache, recolor_frames
+
+
+def colorsys_recolor(frame, palette):
+    """对照：逐像素转换，和 Palette 的色相转动规则相同"""
+    surface = frame.surface.copy()
+    width, height = surface.get_size()
+    for x in range(width):
+        for y in range(height):
+            r, g, b, a = surface.get_at((x, y))
+            if a == 0:
+                continue
+            h, s, v = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
+            if s < palette.min_saturation:
+                continue
+            for start, end, shift in palette.hue_shifts:
+                if start <= h <= end:
+                    rgb = colorsys.hsv_to_rgb((h + shift) % 1.0, s, v)
+                    surface.set_at((x, y), [int(c * 255 + 0.5) for c in rgb] + [a])
+                    break
+    return surface
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    name = sys.argv[2] if len(sys.argv) > 2 else "樱花"
+    palette = PALETTES[name]
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    character = ImageCharacter(os.path.join(ROOT, "images"), use_cache=False)
+    character.finalize_sprites()
+    sources = list(character.images.values()) or [character.get_sprite("idle")]
+    frames = [sources[i % len(sources)] for i in range(count)]
+    pixels = sum(f.surface.get_width() * f.surface.get_height() for f in frames)
+    print(f"配色 {name}，{count} 帧，共 {pixels / 1e6:.2f}M 像素")
+
+    start = time.perf_counter()
+    colorsys_recolor(frames[0], palette)
+    per_pixel = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for frame in frames:
+        recolor_frames([frame], palette)
+    per_frame = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    recolored = recolor_frames(frames, palette)
+    one_pass = (time.perf_counter() - start) * 1000
+
+    cache = VariantCache()
+    cache.get(name, palette, frames)
+    start = time.perf_counter()
+    for _ in range(1000):
+        cache.get(name, palette, frames)
+    hit = (time.perf_counter() - start) * 1000
+
+    variant_bytes = sum(
+        f.surface.get_width() * f.surface.get_height() * 4 for f in recolored
+    )
+    print(f"  逐像素 colorsys  {per_pixel:9.1f}ms（仅第一帧）")
+    print(f"  NumPy 逐帧       {per_frame:9.1f}ms")
+    print(f"  NumPy 一次处理   {one_pass:9.1f}ms")
+    print(f"  缓存命中         {hit:9.3f}µs/次")
+    print(f"  每组变体占用     {variant_bytes / 1024 / 1024:9.1f}MB")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
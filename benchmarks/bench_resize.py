@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调整大小测试
+对比从文件重新解码和从内存中的分辨率金字塔重新采样两种方式，
+创建新尺寸角色的耗时（后台线程），以及切换时主线程的耗时
+用法: python benchmarks/bench_resize.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import pygame
+
+from image_character import ImageCharacter
+from image_pyramid import get_pyramid_store
+
+SIZES = [(120, 168), (200, 280), (280, 392), (173, 242)]
+
+
+def timed_resize(image_dir, size, from_disk):
+    if from_disk:
+        get_pyramid_store().clear()
+    start = time.perf_counter()
+    character = ImageCharacter(image_dir, size[0], size[1], use_cache=False)
+    build = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    character.finalize_sprites()
+    swap = (time.perf_counter() - start) * 1000
+    return build, swap
+
+
+def main():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    image_dir = os.path.join(ROOT, "images")
+
+    # 第一次加载：解码文件并生成金字塔
+    timed_resize(image_dir, (200, 280), from_disk=True)
+    store = get_pyramid_store()
+    print(f"金字塔占用 {store.bytes_used / 1024 / 1024:.1f} MB")
+
+    for size in SIZES:
+        disk_build, disk_swap = timed_resize(image_dir, size, from_disk=True)
+        timed_resize(image_dir, (200, 280), from_disk=False)
+        mem_build, mem_swap = timed_resize(image_dir, size, from_disk=False)
+        print(
+            f"{size[0]}x{size[1]}: 重新解码 {disk_build:7.1f}ms  "
+            f"金字塔 {mem_build:6.1f}ms  主线程切换 {mem_swap:5.1f}ms"
+        )
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精灵磁盘缓存测试
+对比不使用缓存、缓存未命中（首次写入）、缓存命中三种情况下加载 images/ 的耗时
+用法: python benchmarks/bench_sprite_cache.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import pygame
+
+import sprite_cache
+from image_character import ImageCharacter
+from image_pyramid import get_pyramid_store
+
+
+def timed_load(image_dir, size, use_cache):
+    # 清空内存中的分辨率金字塔，每次都要从文件解码
+    get_pyramid_store().clear()
+    start = time.perf_counter()
+    ImageCharacter(image_dir, size[0], size[1], use_cache=use_cache)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    image_dir = os.path.join(ROOT, "images")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        sprite_cache._sprite_cache = sprite_cache.SpriteCache(cache_dir)
+        for size in [(120, 168), (200, 280), (280, 392)]:
+            no_cache = timed_load(image_dir, size, use_cache=False)
+            miss = timed_load(image_dir, size, use_cache=True)
+            hit = timed_load(image_dir, size, use_cache=True)
+            print(
+                f"{size[0]}x{size[1]}: 无缓存 {no_cache:7.1f}ms  "
+                f"首次写入 {miss:7.1f}ms  命中 {hit:6.1f}ms"
+            )
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动加载测试
+生成 6 个状态 × 60 帧的合成动画素材，用不同的线程数加载 AnimatedCharacter，
+再测渐进式启动（懒加载）显示出预览和完整质量的第一个状态各要多久
+用法: python benchmarks/bench_startup.py [每个状态的帧数]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import pygame
+from PIL import Image, ImageDraw
+
+import image_decoder
+from image_character import AnimatedCharacter
+from image_pyramid import get_pyramid_store
+
+STATES = ["idle", "walk", "sit", "sleep", "happy", "surprise"]
+
+
+def make_assets(root, frames_per_state, size=(600, 840)):
+    """每帧画一些随机的椭圆，保存为 PNG"""
+    rng = random.Random(0)
+    for state in STATES:
+        state_dir = os.path.join(root, state)
+        os.makedirs(state_dir)
+        for i in range(frames_per_state):
+            img = Image.new("RGBA", size, (0, 0, 0, 0))
+            draw = ImageDraw.Draw(img)
+            for _ in range(12):
+                x = rng.randint(50, size[0] - 150)
+                y = rng.randint(50, size[1] - 150)
+                color = tuple(rng.randint(0, 255) for _ in range(3)) + (255,)
+                draw.ellipse([x, y, x + 100, y + 100], fill=color)
+            img.save(os.path.join(state_dir, f"{i:03d}.png"))
+
+
+def measure_progressive(root):
+    """懒加载：返回 (第一帧, 预览, 完整质量) 距创建角色的时间（秒）"""
+    get_pyramid_store().clear()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        character = AnimatedCharacter(root, 200, 280, use_cache=False, lazy=True)
+        character.get_sprite("idle", 0)
+        first_frame = time.perf_counter() - start
+        preview = None
+        while not character.is_ready("idle"):
+            time.sleep(0.001)
+            character.get_sprite("idle", 0)
+            if preview is None and "idle" in character.previews:
+                preview = time.perf_counter() - start
+    return first_frame, preview, time.perf_counter() - start
+
+
+def main():
+    frames_per_state = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores})
+
+    with tempfile.TemporaryDirectory() as root:
+        make_assets(root, frames_per_state)
+        print(f"{len(STATES)} 个状态 × {frames_per_state} 帧，CPU 核数 {cores}")
+
+        baseline = None
+        for workers in worker_counts:
+            image_decoder.set_decode_workers(workers)
+            # 每次都从文件解码，不使用上一轮留在内存里的分辨率金字塔
+            get_pyramid_store().clear()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                AnimatedCharacter(root, 200, 280, use_cache=False)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"  {workers:>2} 线程: {elapsed:6.2f}s  加速比 {baseline / elapsed:4.2f}x")
+
+        image_decoder.set_decode_workers(cores)
+        first_frame, preview, full = measure_progressive(root)
+        preview = f"{preview * 1000:.0f}ms" if preview is not None else "无"
+        print(
+            f"  渐进式启动: 第一帧 {first_frame * 1000:.0f}ms  "
+            f"预览 {preview}  idle 完整质量 {full * 1000:.0f}ms"
+        )
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式动画测试
+生成一个很长的 idle 动画，对比整段加载和流式播放的内存占用，
+并按 100ms/帧 实时播放几秒，统计解码跟不上的次数（缓冲区欠载）。
+流式播放时和桌宠一样开着磁盘缓存（放在临时目录里）
+用法: python benchmarks/bench_stream.py [帧数] [提前解码的帧数]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import pygame
+from PIL import Image, ImageDraw
+
+import sprite_cache
+from image_character import AnimatedCharacter
+from image_pyramid import get_pyramid_store
+from state_loader import frame_bytes
+
+PLAY_SECONDS = 5
+
+
+def make_frames(root, count, size=(600, 840)):
+    """一个圆沿对角线移动的动画"""
+    anim_dir = os.path.join(root, "idle")
+    os.makedirs(anim_dir)
+    for i in range(count):
+        img = Image.new("RGBA", size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        x = 50 + (size[0] - 250) * i // count
+        y = 50 + (size[1] - 250) * i // count
+        draw.ellipse([x, y, x + 150, y + 150], fill=(100, 120, 160, 255))
+        floor = [40, size[1] - 60, size[0] - 40, size[1] - 20]
+        draw.rectangle(floor, fill=(80, 80, 80, 255))
+        img.save(os.path.join(anim_dir, f"{i:03d}.png"))
+
+
+def play(character, seconds):
+    """按真实时间播放，返回每帧调用 get_sprite 的最长耗时（毫秒）"""
+    worst = 0.0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        character.get_sprite("idle", pygame.time.get_ticks())
+        worst = max(worst, (time.perf_counter() - start) * 1000)
+        time.sleep(0.016)
+    return worst
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    ahead = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    with tempfile.TemporaryDirectory() as root:
+        make_frames(root, count)
+        print(f"idle 动画 {count} 帧，提前解码 {ahead} 帧")
+
+        get_pyramid_store().clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            full = AnimatedCharacter(root, 200, 280, use_cache=False)
+        load = time.perf_counter() - start
+        full_bytes = sum(frame_bytes(f) for f in full.animations["idle"])
+        print(f"  整段加载: {load:6.2f}s  {full_bytes / 1024 / 1024:6.1f} MB")
+        del full
+
+        get_pyramid_store().clear()
+        cache_dir = os.path.join(root, "cache")
+        sprite_cache._sprite_cache = sprite_cache.SpriteCache(cache_dir)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            streamed = AnimatedCharacter(
+                root, 200, 280, stream_threshold=0, stream_ahead=ahead
+            )
+        load = time.perf_counter() - start
+        stream = streamed.streams["idle"]
+        worst = play(streamed, PLAY_SECONDS)
+        frame_size = full_bytes / count
+        print(
+            f"  流式播放: {load:6.2f}s  {(ahead + 1) * frame_size / 1024 / 1024:6.1f} MB  "
+            f"播放 {PLAY_SECONDS}s 解码 {stream.decoded} 帧  "
+            f"欠载 {stream.underruns} 次  单帧最长 {worst:.1f}ms"
+        )
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pillow → pygame 像素传递测试
+对矢量角色所有状态和循环动画帧用到的各层（已经光栅化好的 RGBA 图片），
+比较三种把它们变成可以叠加的层 surface 的方式：
+  fromstring   完整画布 Image.tobytes()，pygame.image.fromstring 复制进 surface
+  整张再裁剪   完整画布 Image.tobytes()，frombuffer 后切出不透明区域再 convert()
+  裁剪 BGRA    Pillow 里裁到不透明区域，按 pygame 的字节顺序输出，surface 直接引用
+               （VectorSpriteCache.put 用的 trim_layer）
+tracemalloc 只统计 Python 分配的内存（bytes），SDL 自己的像素内存不在其中：
+“峰值”反映传递过程中多出来的副本；“保留”是 surface 还在引用的 Python 内存，
+“合计”再加上 SDL 自己保存的像素，是这些层实际占用的内存
+用法: python benchmarks/bench_transfer.py [尺寸]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import pygame
+
+from src import vector_cache
+from src.character_generator import LuotianyiCharacter
+
+
+def via_fromstring(images):
+    # 原来的写法，pygame-ce 里 fromstring 已标记为弃用
+    warnings.simplefilter("ignore", DeprecationWarning)
+    return [pygame.image.fromstring(img.tobytes(), img.size, img.mode) for img in images]
+
+
+def via_full_canvas(images):
+    surfaces = []
+    for img in images:
+        bbox = img.getbbox() or (0, 0, 1, 1)
+        rect = pygame.Rect(bbox[0], bbox[1], bbox[2] - bbox[0], bbox[3] - bbox[1])
+        surface = pygame.image.frombuffer(img.tobytes(), img.size, "RGBA")
+        surfaces.append(
+            surface.subsurface(rect).convert(pygame.Surface((1, 1), pygame.SRCALPHA))
+        )
+    return surfaces
+
+
+def via_trim(images):
+    return [vector_cache.trim_layer(img)[0].surface for img in images]
+
+
+def measure(convert, images, sdl_owned, rounds=10):
+    """返回 (平均毫秒, 峰值 KB, 保留 KB, 合计 KB)"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        convert(images)
+    elapsed = (time.perf_counter() - start) / rounds * 1000
+
+    tracemalloc.start()
+    surfaces = convert(images)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    total = retained
+    if sdl_owned:
+        total += sum(s.get_width() * s.get_height() * 4 for s in surfaces)
+    del surfaces
+    return elapsed, peak / 1024, retained / 1024, total / 1024
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pygame.init()
+    # 不动用户目录下的缓存
+    cache_dir = tempfile.TemporaryDirectory()
+    vector_cache._vector_cache = vector_cache.VectorSpriteCache(cache_dir.name)
+    _, layers = LuotianyiCharacter(size).display_lists()
+    images = [display_list.rasterize(size) for _, display_list in layers.values()]
+    print(f"{len(images)} 层，尺寸 {size}，完整画布每层 {size * size * 4 / 1024:.1f}KB")
+
+    # 预热，避免第一次调用的导入和缓存开销算进去
+    via_fromstring(images[:1])
+    for label, convert, sdl_owned in [
+        ("fromstring", via_fromstring, True),
+        ("整张再裁剪", via_full_canvas, True),
+        ("裁剪 BGRA", via_trim, False),
+    ]:
+        elapsed, peak, retained, total = measure(convert, images, sdl_owned)
+        # 中文字符占两列
+        pad = " " * (12 - sum(2 if ord(c) > 127 else 1 for c in label))
+        print(
+            f"  {label}{pad}{elapsed:7.2f}ms  峰值 {peak:8.1f}KB  "
+            f"保留 {retained:8.1f}KB  合计 {total:8.1f}KB"
+        )
+    cache_dir.cleanup()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+矢量角色生成测试
+对比 LuotianyiCharacter 在三种大小之间来回切换时，每次重新光栅化、
+命中磁盘缓存（重新启动后）和命中内存缓存（同一进程里再次调整大小）的耗时
+用法: python benchmarks/bench_vector.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import pygame
+
+from src import vector_cache
+from src.character_generator import LuotianyiCharacter
+
+SIZES = [150, 200, 250]
+
+
+def time_sizes(rounds=5):
+    """每种大小各创建 rounds 次角色，返回平均每次的毫秒数"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for size in SIZES:
+            LuotianyiCharacter(size)
+    return (time.perf_counter() - start) / (rounds * len(SIZES)) * 1000
+
+
+def main():
+    pygame.init()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = vector_cache.VectorSpriteCache(cache_dir)
+        vector_cache._vector_cache = cache
+
+        # 每次都清空内存和磁盘缓存，相当于原来每次构造都重新绘制
+        start = time.perf_counter()
+        for size in SIZES:
+            cache.clear()
+            for entry in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, entry))
+            LuotianyiCharacter(size)
+        cold = (time.perf_counter() - start) / len(SIZES) * 1000
+
+        # 磁盘缓存已经写好，清空内存缓存模拟重新启动
+        start = time.perf_counter()
+        for size in SIZES:
+            cache.clear()
+            LuotianyiCharacter(size)
+        disk = (time.perf_counter() - start) / len(SIZES) * 1000
+
+        memory = time_sizes()
+
+    print(f"LuotianyiCharacter，{len(LuotianyiCharacter.STATES)} 个状态，大小 {SIZES}")
+    print(f"  重新绘制       {cold:8.2f} ms/次")
+    print(f"  磁盘缓存       {disk:8.2f} ms/次")
+    print(f"  内存缓存       {memory:8.2f} ms/次")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
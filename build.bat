@@ -10,7 +10,11 @@ echo Step 1: Installing PyInstaller...
 pip install pyinstaller
 echo.
 
-echo Step 2: Packaging...
+echo Step 2: Building sprite pack...
+python src\asset_pack.py images -o images.ltpack
+echo.
+
+echo Step 3: Packaging...
 pyinstaller --noconfirm --clean luotianyi.spec
 echo.
 
@@ -20,7 +24,7 @@ if errorlevel 1 (
     exit /b 1
 )
 
-echo Step 3: Done!
+echo Step 4: Done!
 echo.
 echo Output: dist\LuotianyiPet\
 echo EXE:    dist\LuotianyiPet\LuotianyiPet.exe
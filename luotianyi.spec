@@ -7,12 +7,18 @@ import os
 
 block_cipher = None
 
+# 有资源包（python src/asset_pack.py images）时只打包资源包，
+# 运行时直接 mmap 预先缩放好的精灵，不再带上零散的 PNG
+if os.path.exists('images.ltpack'):
+    image_datas = [('images.ltpack', '.')]
+else:
+    image_datas = [('images', 'images')]
+
 a = Analysis(
     ['run_image.py'],
     pathex=['src'],
     binaries=[],
-    datas=[
-        ('images', 'images'),
+    datas=image_datas + [
         ('src', 'src'),
     ],
     hiddenimports=[
@@ -14,9 +14,12 @@ def check_dependencies():
     try:
         import pygame
         import PIL
-        import win32api
         import numpy
 
+        # 无窗口（headless）模式不需要 pywin32
+        if sys.platform == "win32":
+            import win32api
+
         print("所有依赖已安装")
         return True
     except ImportError as e:
@@ -65,4 +68,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的程序里，矢量角色的进程池需要这一行才能启动子进程
+    import multiprocessing
+
+    multiprocessing.freeze_support()
     main()
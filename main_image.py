@@ -14,9 +14,12 @@ def check_dependencies():
     try:
         import pygame
         import PIL
-        import win32api
         import numpy
 
+        # 无窗口（headless）模式不需要 pywin32
+        if sys.platform == "win32":
+            import win32api
+
         print("所有依赖已安装")
         return True
     except ImportError as e:
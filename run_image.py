@@ -23,8 +23,11 @@ def check_dependencies():
     try:
         import pygame
         import PIL
-        import win32api
         import numpy
+
+        # 无窗口（headless）模式不需要 pywin32
+        if sys.platform == "win32":
+            import win32api
         return True
     except ImportError as e:
         print(f"缺少依赖: {e}")
@@ -0,0 +1,105 @@
+"""
+动画文件
+除了按序号命名的图片目录之外，一个状态的动画还可以是：
+  walk.gif                         GIF 动画
+  walk.png                         APNG 动画（只有一帧时仍然当作静态图片）
+  walk_sheet.png + walk_sheet.json 精灵表和网格描述
+一个文件一次解码出所有帧，并带上文件里记录的每帧时长
+"""
+
+import json
+import os
+
+from PIL import Image, ImageSequence
+
+SHEET_SUFFIX = "_sheet"
+
+# 时长小于这个值（毫秒）的帧按默认帧间隔播放，和浏览器对 GIF 的处理一致
+MIN_FRAME_DURATION = 20
+
+
+def sheet_manifest_path(filepath):
+    """精灵表对应的网格描述文件：walk_sheet.png -> walk_sheet.json"""
+    return os.path.splitext(filepath)[0] + ".json"
+
+
+def is_sheet(filepath):
+    """带网格描述文件的精灵表"""
+    return filepath.endswith(SHEET_SUFFIX + ".png") and os.path.isfile(
+        sheet_manifest_path(filepath)
+    )
+
+
+def is_apng(filepath):
+    """只读文件头判断是不是多帧的 APNG"""
+    try:
+        with Image.open(filepath) as image:
+            return getattr(image, "n_frames", 1) > 1
+    except OSError:
+        return False
+
+
+def find_animation_file(image_dir, state):
+    """
+    查找某个状态的单文件动画，没有时返回 None。
+    优先级：walk.gif、walk_sheet.png（需要有 walk_sheet.json）、多帧的 walk.png
+    """
+    gif = os.path.join(image_dir, state + ".gif")
+    if os.path.isfile(gif):
+        return gif
+    sheet = os.path.join(image_dir, state + SHEET_SUFFIX + ".png")
+    if is_sheet(sheet):
+        return sheet
+    png = os.path.join(image_dir, state + ".png")
+    if os.path.isfile(png) and is_apng(png):
+        return png
+    return None
+
+
+def _duration(value):
+    if value is None or value < MIN_FRAME_DURATION:
+        return None
+    return int(value)
+
+
+def read_frames(image, filepath):
+    """
+    把打开的图片拆成帧，返回 [(RGBA 图片, 时长毫秒或 None)]。
+    时长为 None 的帧使用角色的默认帧间隔
+    """
+    if is_sheet(filepath):
+        with open(sheet_manifest_path(filepath), encoding="utf-8") as f:
+            manifest = json.load(f)
+        return _split_sheet(image.convert("RGBA"), manifest)
+
+    if getattr(image, "n_frames", 1) > 1:
+        # Pillow 会按 GIF / APNG 的 disposal、blend 规则合成出完整的每一帧
+        return [
+            (frame.convert("RGBA"), _duration(frame.info.get("duration")))
+            for frame in ImageSequence.Iterator(image)
+        ]
+
+    return [(image.convert("RGBA"), None)]
+
+
+def _split_sheet(sheet, manifest):
+    """
+    按网格切分精灵表。manifest 示例：
+      {"columns": 4, "rows": 2, "count": 7, "duration": 120}
+    count 省略时为 columns × rows；也可以用 "durations": [...] 给出每帧时长
+    """
+    columns = manifest["columns"]
+    rows = manifest.get("rows", 1)
+    count = manifest.get("count", columns * rows)
+    cell_w = sheet.width // columns
+    cell_h = sheet.height // rows
+    durations = manifest.get("durations") or [manifest.get("duration")] * count
+
+    frames = []
+    for i in range(count):
+        x = i % columns * cell_w
+        y = i // columns * cell_h
+        frames.append(
+            (sheet.crop((x, y, x + cell_w, y + cell_h)), _duration(durations[i]))
+        )
+    return frames
@@ -0,0 +1,53 @@
+"""
+动画时间轴
+由进入状态以来经过的时间直接算出当前帧，而不是每次调用前进一帧：
+主循环卡住一会儿（比如右键菜单打开时）之后会跳过错过的帧，不会变成慢动作
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+
+
+class Timeline:
+    def __init__(self, durations, loop=True, next_state=None):
+        """
+        durations:  每帧的显示时长（毫秒，必须大于 0）
+        loop:       为假时只播放一次，播完停在最后一帧
+        next_state: 一次性动画播完后要切换到的状态（None 表示不切换）
+        """
+        self.durations = durations
+        self.loop = loop
+        self.next_state = next_state
+        # 每帧结束的时间
+        self.ends = list(accumulate(durations))
+        self.total = self.ends[-1]
+        # 所有帧时长相同时直接整除，不需要二分查找
+        self._uniform = durations[0] if len(set(durations)) == 1 else None
+
+    def __len__(self):
+        return len(self.durations)
+
+    def frame_at(self, elapsed):
+        """进入状态 elapsed 毫秒后应该显示的帧序号"""
+        elapsed = max(elapsed, 0)
+        if elapsed >= self.total:
+            if not self.loop:
+                return len(self.durations) - 1
+            elapsed %= self.total
+        if self._uniform is not None:
+            return int(elapsed // self._uniform)
+        return bisect_right(self.ends, elapsed)
+
+    def finished(self, elapsed):
+        """一次性动画是否已经播完"""
+        return not self.loop and elapsed >= self.total
+
+    def next_change(self, elapsed):
+        """下一次换帧距进入状态的时间（毫秒），一次性动画播完后返回 None"""
+        elapsed = max(elapsed, 0)
+        cycle_start = 0
+        if elapsed >= self.total:
+            if not self.loop:
+                return None
+            cycle_start = elapsed // self.total * self.total
+        return cycle_start + self.ends[self.frame_at(elapsed - cycle_start)]
@@ -0,0 +1,199 @@
+"""
+单文件精灵资源包
+文件头之后是 JSON 索引（状态 -> 文件列表，每个文件的各帧的像素尺寸、绘制偏移、画布大小和显示时长），
+再往后是一个或多个目标尺寸下预先缩放、裁剪好的 RGBA 像素。
+运行时整个文件 mmap 进来，用 frombuffer 直接引用，不解码、不缩放、不复制。
+
+生成资源包：
+    python src/asset_pack.py images -o images.ltpack --size 120x168 --size 200x280
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+import pygame
+
+from sprite_atlas import SpriteFrame
+
+# 文件头：魔数、版本、JSON 索引的字节数
+_HEADER = struct.Struct("<4sII")
+_MAGIC = b"LTYP"
+_VERSION = 2
+# 每帧像素数据按 16 字节对齐
+_ALIGN = 16
+
+# 右键菜单里的三种大小
+DEFAULT_SIZES = [(120, 168), (200, 280), (280, 392)]
+
+
+def default_pack_path(image_dir):
+    """images/ 对应的资源包放在它旁边：images.ltpack"""
+    return os.path.normpath(image_dir) + ".ltpack"
+
+
+def _size_key(width, height):
+    return f"{width}x{height}"
+
+
+def _align(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class AssetPack:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._data) < _HEADER.size:
+            raise ValueError("truncated asset pack")
+        magic, version, index_len = _HEADER.unpack_from(self._data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not an asset pack of this version")
+
+        index = json.loads(
+            bytes(self._data[_HEADER.size : _HEADER.size + index_len]).decode("utf-8")
+        )
+        self.path = path
+        self.mtime = os.stat(path).st_mtime
+        self._data_start = _align(_HEADER.size + index_len)
+        # "image:idle" / "anim:walk" -> 相对 images/ 的文件路径列表
+        self.states = {
+            tuple(name.split(":", 1)): paths for name, paths in index["states"].items()
+        }
+        # "200x280" -> {相对路径: [[数据偏移, 宽, 高, 偏移x, 偏移y, 画布宽, 画布高, 时长]]}
+        # 静态图片只有一帧，GIF、精灵表等有多帧；时长为 null 时使用默认帧间隔
+        self._frames = index["frames"]
+
+    def sizes(self):
+        return [tuple(int(v) for v in key.split("x")) for key in self._frames]
+
+    def has_size(self, width, height):
+        return _size_key(width, height) in self._frames
+
+    def __contains__(self, relpath):
+        return any(relpath in frames for frames in self._frames.values())
+
+    def frames(self, relpath, width, height):
+        """返回资源包中这个文件的 SpriteFrame 列表（直接引用 mmap 的内存），没有时返回 None"""
+        entries = self._frames.get(_size_key(width, height), {}).get(relpath)
+        if entries is None:
+            return None
+        frames = []
+        for offset, w, h, ox, oy, canvas_w, canvas_h, duration in entries:
+            start = self._data_start + offset
+            surface = pygame.image.frombuffer(
+                memoryview(self._data)[start : start + w * h * 4], (w, h), "RGBA"
+            )
+            frames.append(
+                SpriteFrame(surface, (ox, oy), (canvas_w, canvas_h), duration)
+            )
+        return frames
+
+
+_packs = {}
+
+
+def open_pack(path):
+    """打开（并缓存）资源包，文件不存在或格式不对时返回 None"""
+    path = os.path.abspath(path)
+    if path not in _packs:
+        pack = None
+        if os.path.exists(path):
+            try:
+                pack = AssetPack(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring asset pack {path}: {e}")
+        _packs[path] = pack
+    return _packs[path]
+
+
+def build_pack(image_dir, output, sizes=DEFAULT_SIZES):
+    """把 image_dir 下的所有状态图片、动画帧按 sizes 缩放后写进一个资源包"""
+    # 只借用角色的文件扫描规则（lazy 模式下不会解码任何图片）
+    from image_character import AnimatedCharacter
+    from image_decoder import decode_frames, get_decode_pool
+
+    scanner = AnimatedCharacter(image_dir, use_cache=False, lazy=True, use_pack=False)
+    states = {
+        f"{kind}:{state}": [
+            os.path.relpath(path, image_dir).replace(os.sep, "/") for path in paths
+        ]
+        for (kind, state), paths in scanner.sources.items()
+    }
+    relpaths = sorted({path for paths in states.values() for path in paths})
+
+    pool = get_decode_pool()
+    frames = {}
+    blobs = []
+    offset = 0
+    for width, height in sizes:
+        futures = [
+            pool.submit(decode_frames, os.path.join(image_dir, rel), width, height)
+            for rel in relpaths
+        ]
+        entries = {}
+        for rel, future in zip(relpaths, futures):
+            entries[rel] = []
+            for decoded in future.result():
+                w, h = decoded.size
+                entries[rel].append(
+                    [offset, w, h, *decoded.offset, *decoded.canvas_size]
+                    + [decoded.duration]
+                )
+                blobs.append((offset, decoded.pixels))
+                offset = _align(offset + len(decoded.pixels))
+        frames[_size_key(width, height)] = entries
+
+    index = json.dumps(
+        {"states": states, "frames": frames}, ensure_ascii=False
+    ).encode("utf-8")
+    data_start = _align(_HEADER.size + len(index))
+
+    tmp = output + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(index)))
+        f.write(index)
+        for blob_offset, pixels in blobs:
+            f.seek(data_start + blob_offset)
+            f.write(pixels)
+    os.replace(tmp, output)
+    return len(relpaths), offset
+
+
+def _parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把 images/ 目录打包成单文件精灵资源包")
+    parser.add_argument("image_dir", nargs="?", default="images")
+    parser.add_argument("-o", "--output", help="输出文件，默认是 <image_dir>.ltpack")
+    parser.add_argument(
+        "--size",
+        action="append",
+        type=_parse_size,
+        help="目标尺寸 WxH，可以指定多次（默认 120x168、200x280、280x392）",
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.image_dir):
+        print(f"Image directory '{args.image_dir}' not found")
+        return 1
+    output = args.output or default_pack_path(args.image_dir)
+    start = time.perf_counter()
+    count, data_bytes = build_pack(args.image_dir, output, args.size or DEFAULT_SIZES)
+    print(
+        f"Packed {count} images x {len(args.size or DEFAULT_SIZES)} sizes "
+        f"into {output} ({data_bytes / 1024 / 1024:.1f} MB) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
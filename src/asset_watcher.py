@@ -0,0 +1,109 @@
+"""
+图片目录热重载
+低频轮询 os.scandir 得到的修改时间和文件大小，找出新增、修改、删除的图片；
+每次 poll() 只花固定的时间预算，目录很大时一次完整扫描会分摊到几帧里完成
+"""
+
+import os
+import time
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif")
+# 精灵表的网格描述文件改动后也要重新切分
+WATCH_EXTENSIONS = IMAGE_EXTENSIONS + (".json",)
+
+
+class AssetWatcher:
+    def __init__(self, root, interval=1000, budget=2.0, extensions=WATCH_EXTENSIONS):
+        """
+        interval: 两次完整扫描之间的间隔（毫秒）
+        budget:   每次 poll() 最多花在 scandir/stat 上的时间（毫秒）
+        """
+        self.root = root
+        self.interval = interval
+        self.budget = budget
+        self.extensions = extensions
+
+        self._next_poll = 0
+        self._scan = None  # 进行中的扫描：[待扫描目录, 当前目录的迭代器, 新快照]
+        self._finished = {}
+
+        # 统计信息
+        self.passes = 0
+        self.polls = 0
+        self.last_pass_ms = 0.0  # 上一次完整扫描累计花费的时间
+        self.max_poll_ms = 0.0  # 单次 poll() 花费的最长时间
+        self._pass_ms = 0.0
+
+        # 启动时先完整扫描一次作为基准
+        self.snapshot = {}
+        self._scan = [[root], None, {}]
+        while self._scan is not None:
+            self._step(float("inf"))
+        self.snapshot = self._finished
+
+    def poll(self, now):
+        """
+        每帧调用也没关系：没到扫描时间时立即返回空列表。
+        一次完整扫描结束时，返回有变化的文件路径（新增、修改、删除）
+        """
+        if self._scan is None:
+            if now < self._next_poll:
+                return []
+            self._scan = [[self.root], None, {}]
+
+        self.polls += 1
+        start = time.perf_counter()
+        self._step(start + self.budget / 1000)
+        spent = (time.perf_counter() - start) * 1000
+        self._pass_ms += spent
+        self.max_poll_ms = max(self.max_poll_ms, spent)
+        if self._scan is not None:
+            return []
+
+        self._next_poll = now + self.interval
+        snapshot = self._finished
+        changed = sorted(
+            path
+            for path in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(path) != self.snapshot.get(path)
+        )
+        self.snapshot = snapshot
+        return changed
+
+    def _step(self, deadline):
+        """扫描到 deadline（perf_counter 时间）为止，全部扫完时 _scan 置为 None"""
+        dirs, entries, snapshot = self._scan
+        while True:
+            if entries is None:
+                if not dirs:
+                    break
+                try:
+                    entries = os.scandir(dirs.pop())
+                except OSError:
+                    continue
+
+            entry = next(entries, None)
+            if entry is None:
+                entries.close()
+                entries = None
+                continue
+            try:
+                if entry.is_dir():
+                    dirs.append(entry.path)
+                elif entry.name.lower().endswith(self.extensions):
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                # 扫描期间被删除的文件
+                pass
+
+            if time.perf_counter() >= deadline:
+                # 预算用完，下次 poll() 从这个目录的当前位置继续
+                self._scan[1] = entries
+                return
+
+        self._scan = None
+        self._finished = snapshot
+        self.passes += 1
+        self.last_pass_ms = self._pass_ms
+        self._pass_ms = 0.0
@@ -0,0 +1,35 @@
+"""
+气泡缓存
+把画好的对话气泡（背景、边框、换行后的文字）缓存起来，气泡显示期间每帧只需一次 blit
+"""
+
+from collections import OrderedDict
+
+
+class BubbleCache:
+    def __init__(self, render, maxsize=16):
+        # render(text, width, font) -> 画好的气泡 Surface
+        self.render = render
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text, width, font):
+        key = (text, width, font)
+        surface = self._cache.get(key)
+        if surface is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.render(text, width, font)
+        self._cache[key] = surface
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """窗口大小或字体变化后调用"""
+        self._cache.clear()
@@ -1,100 +1,189 @@
-import pygame
 import math
-import random
-from PIL import Image, ImageDraw
-
-
-class LuotianyiCharacter:
-    def __init__(self, size=200):
-        self.size = size
-        self.images = {}
-        self.generate_sprites()
-
-    def generate_sprites(self):
-        self.images["idle"] = self.draw_idle()
-        self.images["walk"] = self.draw_walk()
-        self.images["sit"] = self.draw_sit()
-        self.images["sleep"] = self.draw_sleep()
-        self.images["happy"] = self.draw_happy()
-        self.images["surprise"] = self.draw_surprise()
-
-    def draw_idle(self):
-        img = Image.new("RGBA", (self.size, self.size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
-
-        center_x, center_y = self.size // 2, self.size // 2
 
-        self.draw_body(draw, center_x, center_y)
-        self.draw_face(draw, center_x, center_y - 20)
-        self.draw_hair(draw, center_x, center_y - 20)
-        self.draw_clothes(draw, center_x, center_y)
-
-        return pygame.image.fromstring(img.tobytes(), img.size, img.mode)
+import pygame
 
-    def draw_walk(self):
-        img = Image.new("RGBA", (self.size, self.size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
+from .display_list import DisplayList, rasterize_all
+from .vector_cache import get_vector_cache
 
-        center_x, center_y = self.size // 2, self.size // 2
+# 绘图代码使用的设计尺寸，其他尺寸按比例缩放
+DESIGN_SIZE = 200
 
-        self.draw_body(draw, center_x, center_y, leg_offset=10)
-        self.draw_face(draw, center_x, center_y - 20, eye_offset=5)
-        self.draw_hair(draw, center_x, center_y - 20, sway=10)
-        self.draw_clothes(draw, center_x, center_y, sway=5)
 
-        return pygame.image.fromstring(img.tobytes(), img.size, img.mode)
+class LuotianyiCharacter:
+    STATES = ["idle", "walk", "sit", "sleep", "happy", "surprise"]
 
-    def draw_sit(self):
-        img = Image.new("RGBA", (self.size, self.size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
+    # 循环动画的状态和一个周期的帧数：扫过 draw_<状态>() 的 phase 参数生成各帧
+    # （行走摆腿、摆头发，待机呼吸，睡觉起伏）
+    CYCLES = {"walk": 8, "idle": 8, "sleep": 8}
 
-        center_x, center_y = self.size // 2, self.size // 2 + 30
+    # 每一帧由这几层从下往上叠成：身体姿势、表情、发型、服装。
+    # 各层单独光栅化、按内容缓存，不同状态里相同的层（比如 idle、happy、surprise
+    # 的身体）只画一次；换表情或服装时只有变了的那一层需要重新画
+    LAYERS = ("body", "face", "hair", "outfit")
 
-        self.draw_body_sitting(draw, center_x, center_y)
-        self.draw_face(draw, center_x, center_y - 50)
-        self.draw_hair(draw, center_x, center_y - 50)
-        self.draw_clothes(draw, center_x, center_y - 20)
+    # 可选的服装和发型：名字 -> 绘制方法，添加新的只需要写一个方法并登记在这里
+    OUTFITS = {"dress": "draw_clothes"}
+    HAIRSTYLES = {"twintails": "draw_hair"}
 
-        return pygame.image.fromstring(img.tobytes(), img.size, img.mode)
+    # 各层的显示列表与尺寸无关，每个进程只记录一次
+    # {(周期帧数, 服装, 发型): ({帧名: [各层的摘要]}, {摘要: (层名, DisplayList)})}
+    _display_lists = {}
 
-    def draw_sleep(self):
-        img = Image.new("RGBA", (self.size, self.size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
+    def __init__(self, size=200, cycles=None, outfit="dress", hairstyle="twintails"):
+        self.size = size
+        self.cycles = self.CYCLES if cycles is None else cycles
+        self.outfit = outfit
+        self.hairstyle = hairstyle
+        self.images = {}
+        self.frames = {}  # 循环动画：状态 -> 一个周期的各帧
+        self.generate_sprites()
 
-        center_x, center_y = self.size // 2, self.size // 2
+    @staticmethod
+    def cycle_frame_name(state, index):
+        return f"{state}.{index}"
+
+    def display_lists(self):
+        """
+        记录各状态和各循环帧每一层的绘图指令，
+        返回 ({帧名: [各层的摘要]}, {摘要: (层名, DisplayList)})，内容相同的层只保留一份
+        """
+        key = (tuple(sorted(self.cycles.items())), self.outfit, self.hairstyle)
+        cls = type(self)
+        if key not in cls._display_lists:
+            frames = {}
+            layers = {}
+
+            def record(name, state, **kwargs):
+                stack = {kind: DisplayList(DESIGN_SIZE) for kind in self.LAYERS}
+                getattr(self, "draw_" + state)(stack, **kwargs)
+                frames[name] = []
+                for kind in self.LAYERS:
+                    digest = stack[kind].digest()
+                    layers.setdefault(digest, (kind, stack[kind]))
+                    frames[name].append(digest)
+
+            for state in self.STATES:
+                record(state, state)
+            for state, count in self.cycles.items():
+                for i in range(count):
+                    record(self.cycle_frame_name(state, i), state, phase=i / count)
+            cls._display_lists[key] = (frames, layers)
+        return cls._display_lists[key]
 
-        self.draw_body_sleeping(draw, center_x, center_y)
-        self.draw_face_sleeping(draw, center_x, center_y - 20)
-        self.draw_hair(draw, center_x, center_y - 20)
-        self.draw_clothes(draw, center_x, center_y)
+    def generate_sprites(self):
+        """
+        按当前尺寸取出各层，内存和磁盘缓存里都没有的一起光栅化（层多时用进程池并行），
+        再叠成各状态的精灵和循环动画的各帧
+        """
+        frames, layers = self.display_lists()
+        cache = get_vector_cache()
+        rasters = {
+            digest: cache.lookup(kind, self.size, digest)
+            for digest, (kind, _) in layers.items()
+        }
+        missing = [digest for digest, surface in rasters.items() if surface is None]
+        rasterized = rasterize_all([layers[d][1] for d in missing], self.size)
+        for digest, image in zip(missing, rasterized):
+            rasters[digest] = cache.put(layers[digest][0], self.size, digest, image)
+
+        surfaces = {
+            name: self.composite([rasters[digest] for digest in digests])
+            for name, digests in frames.items()
+        }
+        self.images = {state: surfaces[state] for state in self.STATES}
+        self.frames = {
+            state: [surfaces[self.cycle_frame_name(state, i)] for i in range(count)]
+            for state, count in self.cycles.items()
+        }
+
+    @staticmethod
+    def composite(layers):
+        """按顺序把各层（裁剪过的 SpriteFrame）alpha 混合到一张新的完整画布上"""
+        surface = pygame.Surface(layers[0].size, pygame.SRCALPHA)
+        surface.blits([(layer.surface, layer.offset) for layer in layers], False)
+        return surface
+
+    def dress_up(self, outfit=None, hairstyle=None):
+        """
+        换服装或发型后重新生成精灵：其余各层直接从缓存里取，只光栅化新的那一层。
+        之后同样要调用 finalize_sprites()
+        """
+        if outfit is not None:
+            self.outfit = outfit
+        if hairstyle is not None:
+            self.hairstyle = hairstyle
+        self.generate_sprites()
 
-        return pygame.image.fromstring(img.tobytes(), img.size, img.mode)
+    def finalize_sprites(self):
+        """转换成显示器像素格式，必须在 display.set_mode() 之后调用"""
+        for state, image in self.images.items():
+            self.images[state] = image.convert_alpha()
+        for state, frames in self.frames.items():
+            self.frames[state] = [frame.convert_alpha() for frame in frames]
+
+    def draw_outfit(self, draw, x, y, sway=0):
+        getattr(self, self.OUTFITS[self.outfit])(draw, x, y, sway=sway)
+
+    def draw_hairstyle(self, draw, x, y, sway=0):
+        getattr(self, self.HAIRSTYLES[self.hairstyle])(draw, x, y, sway=sway)
+
+    def draw_idle(self, layers, phase=0.0):
+        # 呼吸：整个身体随 phase 轻轻上下，各层一起移动才不会错开
+        lift = round(2 * math.sin(2 * math.pi * phase))
+        center_x, center_y = DESIGN_SIZE // 2, DESIGN_SIZE // 2 - lift
+
+        self.draw_body(layers["body"], center_x, center_y)
+        self.draw_face(layers["face"], center_x, center_y - 20)
+        self.draw_hairstyle(layers["hair"], center_x, center_y - 20)
+        self.draw_outfit(layers["outfit"], center_x, center_y)
+
+    def draw_walk(self, layers, phase=0.25):
+        center_x, center_y = DESIGN_SIZE // 2, DESIGN_SIZE // 2
+        # 左右腿交替迈出，头发、裙摆和视线跟着摆动；phase=0.25 时摆到最大
+        swing = math.sin(2 * math.pi * phase)
+
+        self.draw_body(layers["body"], center_x, center_y, leg_offset=round(10 * swing))
+        self.draw_face(
+            layers["face"], center_x, center_y - 20, eye_offset=round(5 * swing)
+        )
+        self.draw_hairstyle(
+            layers["hair"], center_x, center_y - 20, sway=round(10 * swing)
+        )
+        self.draw_outfit(layers["outfit"], center_x, center_y, sway=round(5 * swing))
 
-    def draw_happy(self):
-        img = Image.new("RGBA", (self.size, self.size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
+    def draw_sit(self, layers):
+        center_x, center_y = DESIGN_SIZE // 2, DESIGN_SIZE // 2 + 30
 
-        center_x, center_y = self.size // 2, self.size // 2
+        self.draw_body_sitting(layers["body"], center_x, center_y)
+        self.draw_face(layers["face"], center_x, center_y - 50)
+        self.draw_hairstyle(layers["hair"], center_x, center_y - 50)
+        self.draw_outfit(layers["outfit"], center_x, center_y - 20)
 
-        self.draw_body(draw, center_x, center_y)
-        self.draw_face_happy(draw, center_x, center_y - 20)
-        self.draw_hair(draw, center_x, center_y - 20)
-        self.draw_clothes(draw, center_x, center_y)
+    def draw_sleep(self, layers, phase=0.0):
+        # 睡觉时整个身体随呼吸起伏
+        bob = round(3 * math.sin(2 * math.pi * phase))
+        center_x, center_y = DESIGN_SIZE // 2, DESIGN_SIZE // 2 + bob
 
-        return pygame.image.fromstring(img.tobytes(), img.size, img.mode)
+        self.draw_body_sleeping(layers["body"], center_x, center_y)
+        self.draw_face_sleeping(layers["face"], center_x, center_y - 20)
+        self.draw_hairstyle(layers["hair"], center_x, center_y - 20)
+        self.draw_outfit(layers["outfit"], center_x, center_y)
 
-    def draw_surprise(self):
-        img = Image.new("RGBA", (self.size, self.size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
+    def draw_happy(self, layers):
+        center_x, center_y = DESIGN_SIZE // 2, DESIGN_SIZE // 2
 
-        center_x, center_y = self.size // 2, self.size // 2
+        self.draw_body(layers["body"], center_x, center_y)
+        self.draw_face_happy(layers["face"], center_x, center_y - 20)
+        self.draw_hairstyle(layers["hair"], center_x, center_y - 20)
+        self.draw_outfit(layers["outfit"], center_x, center_y)
 
-        self.draw_body(draw, center_x, center_y)
-        self.draw_face_surprise(draw, center_x, center_y - 20)
-        self.draw_hair(draw, center_x, center_y - 20)
-        self.draw_clothes(draw, center_x, center_y)
+    def draw_surprise(self, layers):
+        center_x, center_y = DESIGN_SIZE // 2, DESIGN_SIZE // 2
 
-        return pygame.image.fromstring(img.tobytes(), img.size, img.mode)
+        self.draw_body(layers["body"], center_x, center_y)
+        self.draw_face_surprise(layers["face"], center_x, center_y - 20)
+        self.draw_hairstyle(layers["hair"], center_x, center_y - 20)
+        self.draw_outfit(layers["outfit"], center_x, center_y)
 
     def draw_body(self, draw, x, y, leg_offset=0):
         body_color = (255, 230, 240)
@@ -2,21 +2,29 @@ import pygame
 import sys
 import random
 import time
-import math
 import threading
-import win32api
-import win32con
-import win32gui
 from .character_generator import LuotianyiCharacter
-from .info_service import get_weather, get_time_info, get_greeting
+from .sprite_atlas import SpriteAtlas, trim_frame
+from .dirty_renderer import DirtyRectRenderer
+from .bubble_cache import BubbleCache
+from .drag_controller import DragController
+from .font_manager import get_font_manager
+from .text_layout import wrap_text
+from .frame_scheduler import FrameScheduler
+from .window_platform import create_platform
+from .info_service import open_weather, get_time_info, get_greeting
 
 
 class DesktopPet:
+    # 循环动画每一帧显示的时间（毫秒）：行走一步 0.8 秒，待机呼吸和睡觉起伏慢一些
+    CYCLE_FRAME_MS = {"walk": 100, "idle": 300, "sleep": 400}
+
     def __init__(self):
+        # Windows 下使用 win32 透明窗口，其他平台使用无窗口的 dummy 驱动
+        self.platform = create_platform()
         pygame.init()
 
-        self.screen_width = win32api.GetSystemMetrics(0)
-        self.screen_height = win32api.GetSystemMetrics(1)
+        self.screen_width, self.screen_height = self.platform.screen_size()
 
         self.pet_size = 200
         self.character = LuotianyiCharacter(self.pet_size)
@@ -28,48 +36,37 @@ class DesktopPet:
             (self.window_width, self.window_height), pygame.NOFRAME | pygame.SRCALPHA
         )
         pygame.display.set_caption("洛天依桌面助手")
+        self.character.finalize_sprites()
+        self.build_frames()
 
-        hwnd = pygame.display.get_wm_info()["window"]
-        win32gui.SetWindowLong(
-            hwnd,
-            win32con.GWL_EXSTYLE,
-            win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
-            | win32con.WS_EX_LAYERED
-            | win32con.WS_EX_TRANSPARENT,
-        )
-
-        win32gui.SetLayeredWindowAttributes(
-            hwnd, win32api.RGB(0, 0, 0), 0, win32con.LWA_COLORKEY
+        self.platform.attach(
+            self.window_width, self.window_height, (0, 0, 0), click_through=True
         )
 
         self.x = self.screen_width - self.window_width - 50
         self.y = self.screen_height - self.window_height - 50
 
-        win32gui.SetWindowPos(
-            hwnd,
-            win32con.HWND_TOPMOST,
-            int(self.x),
-            int(self.y),
-            self.window_width,
-            self.window_height,
-            0,
-        )
+        self.platform.move_window(self.x, self.y)
 
+        # 一帧内的鼠标移动合并成一次窗口移动
         self.dragging = False
-        self.drag_offset_x = 0
-        self.drag_offset_y = 0
+        self.drag = DragController(self.platform)
 
         self.state = "idle"
         self.state_timer = 0
         self.state_duration = random.randint(3000, 8000)
 
-        self.animation_frame = 0
-        self.animation_speed = 0.1
-
         self.bubble_text = ""
         self.bubble_timer = 0
         self.bubble_duration = 3000
 
+        # 字体在后台线程中解析，画好的气泡按 (文字, 窗口宽度, 字体) 缓存
+        self.font_manager = get_font_manager()
+        self.font_manager.resolve_in_background()
+        self.bubble_font_size = 16
+        self.bubble_cache = BubbleCache(self.render_bubble)
+
+        self.drawn_sprite = None  # 最近一次绘制的 (帧, 位置)，用于点击和悬停检测
         self.mouse_over = False
         self.click_timer = 0
 
@@ -90,23 +87,55 @@ class DesktopPet:
             "我在这里陪着你呢~",
         ]
 
-        self.clock = pygame.time.Clock()
+        # 只重绘变化的区域
+        self.renderer = DirtyRectRenderer((0, 0, 0, 0))
+
+        # 拖拽、行走时全速运行，其余时间按计时器按需唤醒
+        self.scheduler = FrameScheduler(active_fps=60, idle_fps=4)
         self.running = True
 
+    def build_frames(self):
+        """
+        把每个状态的精灵和循环动画的各帧裁到不透明区域，打包进一张图集，只 blit 这部分；
+        点击检测用的掩码跟着帧缓存，换尺寸时重新生成
+        """
+        trimmed = {}
+        for state, image in self.character.images.items():
+            frames = self.character.frames.get(state, [image])
+            for i, surface in enumerate(frames):
+                trimmed[(state, i)] = trim_frame(surface)
+        atlas = SpriteAtlas(trimmed)
+        atlas.surface = atlas.surface.convert_alpha()
+        self.frames = {}
+        for state, i in sorted(trimmed):
+            self.frames.setdefault(state, []).append(atlas.region((state, i)))
+
+    def current_frame(self, now):
+        """当前状态这一刻应该显示的帧：循环动画按时间取帧，其余状态只有一帧"""
+        frames = self.frames.get(self.state, self.frames["idle"])
+        frame_ms = self.CYCLE_FRAME_MS.get(self.state)
+        if frame_ms is None or len(frames) == 1:
+            return frames[0]
+        return frames[now // frame_ms % len(frames)]
+
+    def hit_pet(self, pos):
+        """窗口坐标 pos 是否落在最近一次绘制的角色的不透明像素上"""
+        if self.drawn_sprite is None:
+            return False
+        frame, sprite_pos = self.drawn_sprite
+        return frame.hit_test(sprite_pos, pos)
+
     def update_position(self):
-        hwnd = pygame.display.get_wm_info()["window"]
-        win32gui.SetWindowPos(
-            hwnd,
-            win32con.HWND_TOPMOST,
-            int(self.x),
-            int(self.y),
-            self.window_width,
-            self.window_height,
-            0,
-        )
+        self.platform.move_window(self.x, self.y)
 
-    def handle_events(self):
-        for event in pygame.event.get():
+    def update_drag(self, force=False):
+        """把这一帧的拖拽合并成一次窗口移动"""
+        pos = self.drag.flush(pygame.time.get_ticks(), force)
+        if pos is not None:
+            self.x, self.y = pos
+
+    def handle_events(self, events):
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
 
@@ -114,11 +143,14 @@ class DesktopPet:
                 mouse_x, mouse_y = pygame.mouse.get_pos()
 
                 if event.button == 1:
-                    pet_rect = pygame.Rect(50, 50, self.pet_size, self.pet_size)
-                    if pet_rect.collidepoint(mouse_x, mouse_y):
+                    if self.hit_pet((mouse_x, mouse_y)):
                         self.dragging = True
-                        self.drag_offset_x = mouse_x
-                        self.drag_offset_y = mouse_y
+                        self.drag.start(
+                            self.x,
+                            self.y,
+                            self.screen_width - self.window_width,
+                            self.screen_height - self.window_height,
+                        )
                         self.state = "surprise"
                         self.state_timer = 0
                         self.show_bubble("哎呀！别抓我~")
@@ -128,6 +160,8 @@ class DesktopPet:
 
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
+                    if self.dragging:
+                        self.update_drag(force=True)
                     self.dragging = False
                     if self.state == "surprise":
                         self.state = "happy"
@@ -136,27 +170,19 @@ class DesktopPet:
 
             elif event.type == pygame.MOUSEMOTION:
                 if self.dragging:
-                    mouse_x, mouse_y = pygame.mouse.get_pos()
-                    dx = mouse_x - self.drag_offset_x
-                    dy = mouse_y - self.drag_offset_y
-
-                    self.x += dx
-                    self.y += dy
-
-                    self.x = max(0, min(self.x, self.screen_width - self.window_width))
-                    self.y = max(
-                        0, min(self.y, self.screen_height - self.window_height)
-                    )
-
-                    self.update_position()
-
-                    self.drag_offset_x = mouse_x
-                    self.drag_offset_y = mouse_y
+                    self.drag.motion()
 
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
 
+            elif event.type == pygame.WINDOWEXPOSED:
+                # 窗口被遮挡后重新露出，内容需要整窗重绘
+                self.renderer.invalidate()
+
+        if self.dragging:
+            self.update_drag()
+
     def update_state(self):
         current_time = pygame.time.get_ticks()
 
@@ -202,15 +228,7 @@ class DesktopPet:
         if self.bubble_text and current_time - self.bubble_timer > self.bubble_duration:
             self.bubble_text = ""
 
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-        screen_mouse_x = self.x + mouse_x
-        screen_mouse_y = self.y + mouse_y
-
-        pet_screen_rect = pygame.Rect(
-            self.x + 50, self.y + 50, self.pet_size, self.pet_size
-        )
-
-        if pet_screen_rect.collidepoint(screen_mouse_x, screen_mouse_y):
+        if self.hit_pet(pygame.mouse.get_pos()):
             if not self.mouse_over:
                 self.mouse_over = True
                 self.click_timer = current_time
@@ -228,8 +246,6 @@ class DesktopPet:
                 )
                 self.click_timer = current_time
 
-        self.animation_frame += self.animation_speed
-
     def show_bubble(self, text):
         self.bubble_text = text
         self.bubble_timer = pygame.time.get_ticks()
@@ -248,11 +264,11 @@ class DesktopPet:
             root.quit()
 
         def query_weather():
-            self.show_bubble("正在查询天气...")
+            self.show_bubble("正在打开天气预报~")
             self.state = "happy"
             self.state_timer = pygame.time.get_ticks()
-            self.state_duration = 10000
-            get_weather(self._set_pending_bubble)
+            self.state_duration = 3000
+            open_weather()
 
         def query_time():
             info = get_time_info()
@@ -286,6 +302,17 @@ class DesktopPet:
                     (self.window_width, self.window_height),
                     pygame.NOFRAME | pygame.SRCALPHA,
                 )
+                self.platform.attach(
+                    self.window_width,
+                    self.window_height,
+                    (0, 0, 0),
+                    click_through=True,
+                )
+                self.platform.move_window(self.x, self.y)
+                self.character.finalize_sprites()
+                self.build_frames()
+                self.renderer.invalidate()
+                self.bubble_cache.clear()
                 size_window.destroy()
 
             tk.Radiobutton(
@@ -327,78 +354,87 @@ class DesktopPet:
         menu.add_command(label="退出", command=exit_app)
 
         try:
-            menu.tk_popup(win32api.GetCursorPos()[0], win32api.GetCursorPos()[1])
+            x, y = self.platform.get_cursor_pos()
+            menu.tk_popup(x, y)
         finally:
             root.update()
 
     def draw(self):
-        self.screen.fill((0, 0, 0, 0))
+        frame = self.current_frame(pygame.time.get_ticks())
 
-        sprite = self.character.get_sprite(self.state)
+        # 只绘制裁剪后的不透明区域，要加上它在原画布中的偏移
+        sprite_pos = (50 + frame.offset[0], 50 + frame.offset[1])
 
-        if self.state == "walk":
-            offset = int(math.sin(self.animation_frame) * 5)
-            self.screen.blit(sprite, (50 + offset, 50))
-        else:
-            self.screen.blit(sprite, (50, 50))
-
-        if self.bubble_text:
-            self.draw_bubble(self.bubble_text)
+        def draw_scene(screen):
+            rects = [screen.blit(frame.surface, sprite_pos)]
+            if self.bubble_text:
+                rects.append(self.draw_bubble(self.bubble_text))
+            return rects
 
-        pygame.display.flip()
+        self.renderer.render(
+            self.screen, (frame, sprite_pos, self.bubble_text), draw_scene
+        )
+        self.drawn_sprite = (frame, sprite_pos)
 
     def draw_bubble(self, text):
-        font = pygame.font.SysFont("simhei", 16)
-
-        words = text.split()
-        lines = []
-        current_line = ""
-
-        for word in words:
-            test_line = current_line + word + " "
-            if font.size(test_line)[0] <= 180:
-                current_line = test_line
-            else:
-                lines.append(current_line)
-                current_line = word + " "
+        font = self.font_manager.get(self.bubble_font_size)
+        bubble_surf = self.bubble_cache.get(text, self.window_width, font)
+        # 气泡中心固定在 x=150 处
+        bubble_x = 150 - bubble_surf.get_width() // 2
+        bubble_y = 20
+        return self.screen.blit(bubble_surf, (bubble_x, bubble_y))
 
-        if current_line:
-            lines.append(current_line)
+    def render_bubble(self, text, window_width, font):
+        """画出完整的气泡（背景、边框、文字），结果由 bubble_cache 缓存"""
+        lines = wrap_text(text, font, 180)
 
         bubble_height = len(lines) * 25 + 20
         bubble_width = 200
 
-        bubble_x = 150 - bubble_width // 2
-        bubble_y = 20
+        bubble_surf = pygame.Surface((bubble_width, bubble_height), pygame.SRCALPHA)
 
         pygame.draw.rect(
-            self.screen,
+            bubble_surf,
             (255, 255, 255, 230),
-            (bubble_x, bubble_y, bubble_width, bubble_height),
+            (0, 0, bubble_width, bubble_height),
             border_radius=10,
         )
 
         pygame.draw.rect(
-            self.screen,
+            bubble_surf,
             (200, 200, 200, 200),
-            (bubble_x, bubble_y, bubble_width, bubble_height),
+            (0, 0, bubble_width, bubble_height),
             2,
             border_radius=10,
         )
 
         for i, line in enumerate(lines):
-            text_surface = font.render(line.strip(), True, (0, 0, 0))
-            text_rect = text_surface.get_rect(
-                center=(bubble_x + bubble_width // 2, bubble_y + 15 + i * 25)
-            )
-            self.screen.blit(text_surface, text_rect)
+            text_surface = font.render(line, True, (0, 0, 0))
+            text_rect = text_surface.get_rect(center=(bubble_width // 2, 15 + i * 25))
+            bubble_surf.blit(text_surface, text_rect)
+
+        return bubble_surf
+
+    def is_active(self):
+        """拖拽需要连续更新，其余时间画面只在计时器到期或动画换帧时变化"""
+        return self.dragging
+
+    def next_deadlines(self):
+        """下一次状态切换、气泡消失、动画换帧的时间"""
+        deadlines = [self.state_timer + self.state_duration + 1]
+        if self.bubble_text:
+            deadlines.append(self.bubble_timer + self.bubble_duration + 1)
+        frame_ms = self.CYCLE_FRAME_MS.get(self.state)
+        if frame_ms is not None and len(self.frames.get(self.state, ())) > 1:
+            deadlines.append((pygame.time.get_ticks() // frame_ms + 1) * frame_ms)
+        return deadlines
 
     def run(self):
         while self.running:
-            self.handle_events()
+            events = self.scheduler.wait(self.is_active(), self.next_deadlines())
+            self.handle_events(events)
             self.update_state()
             self.draw()
-            self.clock.tick(60)
 
         pygame.quit()
         sys.exit()
@@ -3,23 +3,46 @@ import sys
 import random
 import time
 import math
-import win32api
-import win32con
-import win32gui
-from image_character import ImageCharacter, AnimatedCharacter
+from concurrent.futures import ThreadPoolExecutor
+from image_character import ImageCharacter, AnimatedCharacter, LOAD_POLL_INTERVAL
+from dirty_renderer import DirtyRectRenderer
+from bubble_cache import BubbleCache
+from drag_controller import DragController
+from font_manager import get_font_manager
+from text_layout import wrap_text
+from frame_scheduler import FrameScheduler
+from window_platform import create_platform
+from asset_watcher import AssetWatcher
 from info_service import open_weather, get_time_info, get_greeting
 
 
 class DesktopPetImage:
+    # 从 idle 切换到其他状态的概率
+    IDLE_TRANSITIONS = {"walk": 0.4, "sit": 0.3, "happy": 0.2, "sleep": 0.1}
+
     def __init__(self, use_animation=False):
+        # 启动耗时：第一帧（默认精灵或预览）和当前状态完整质量的帧各用了多久
+        self.startup_start = time.perf_counter()
+        self.startup_times = {}
+
+        # Windows 下使用 win32 透明窗口，其他平台使用无窗口的 dummy 驱动
+        self.platform = create_platform()
         pygame.init()
 
-        self.screen_width = win32api.GetSystemMetrics(0)
-        self.screen_height = win32api.GetSystemMetrics(1)
+        self.screen_width, self.screen_height = self.platform.screen_size()
 
         self.pet_width = 200
         self.pet_height = 280  # 角色高度比宽度大，更符合人物比例
         self.use_animation = use_animation
+        # 各状态的图片在第一次显示时才加载，已加载的帧总大小不超过这个预算
+        self.lazy_sprites = True
+        self.sprite_memory_budget = 32 * 1024 * 1024
+        # 帧数超过这个值的动画边播放边解码，只在内存里保留后面几帧
+        self.stream_threshold = 120
+        # 只播放一次的动画 -> 播完后切换到的状态（None 表示停在最后一帧），其余循环播放
+        self.one_shot_states = {"surprise": None}
+        # 当前配色（palette_swap.PALETTES 里的名字），None 表示原色
+        self.palette = None
 
         # 窗口大小：角色大小 + 上方留给气泡的空间
         self.bubble_area_height = 60
@@ -31,57 +54,40 @@ class DesktopPetImage:
         )
         pygame.display.set_caption("Luotianyi Desktop Pet")
 
+        # 使用 colorkey 让黑色背景透明
+        self.colorkey = (1, 1, 1)  # 用近黑色作为透明色，避免角色本身的黑色被透掉
+
         # 必须在 display.set_mode() 之后创建 character，否则 pygame.image.load() 会失败
-        if use_animation:
-            self.character = AnimatedCharacter(
-                "images", self.pet_width, self.pet_height, frame_delay=100
-            )
-        else:
-            self.character = ImageCharacter("images", self.pet_width, self.pet_height)
+        self.load_character()
+        # 调整大小、切换动画时在这个线程里准备新角色
+        self.loader_thread = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="character"
+        )
+        self.pending_character = None
 
-        self.hwnd = pygame.display.get_wm_info()["window"]
+        # 美术修改 images/ 下的图片后自动重新加载，不用重启
+        # 每秒扫描一次，每帧最多花 2ms，目录很大时一次扫描分几帧完成
+        self.asset_watcher = AssetWatcher("images", interval=1000, budget=2.0)
 
         # 关键修复：只设置 WS_EX_LAYERED，不设置 WS_EX_TRANSPARENT
         # WS_EX_TRANSPARENT 会让鼠标事件穿透窗口，导致无法拖拽
-        win32gui.SetWindowLong(
-            self.hwnd,
-            win32con.GWL_EXSTYLE,
-            win32gui.GetWindowLong(self.hwnd, win32con.GWL_EXSTYLE)
-            | win32con.WS_EX_LAYERED,
-        )
-
-        # 使用 colorkey 让黑色背景透明
-        self.colorkey = (1, 1, 1)  # 用近黑色作为透明色，避免角色本身的黑色被透掉
-        win32gui.SetLayeredWindowAttributes(
-            self.hwnd,
-            win32api.RGB(*self.colorkey),
-            0,
-            win32con.LWA_COLORKEY,
-        )
+        self.platform.attach(self.window_width, self.window_height, self.colorkey)
 
         # 初始位置：屏幕右下角
         self.x = self.screen_width - self.window_width - 80
         self.y = self.screen_height - self.window_height - 80
 
-        win32gui.SetWindowPos(
-            self.hwnd,
-            win32con.HWND_TOPMOST,
-            int(self.x),
-            int(self.y),
-            self.window_width,
-            self.window_height,
-            0,
-        )
+        self.platform.move_window(self.x, self.y)
 
-        # 拖拽相关
+        # 拖拽相关：一帧内的鼠标移动合并成一次窗口移动
         self.dragging = False
-        self.drag_start_x = 0
-        self.drag_start_y = 0
+        self.drag = DragController(self.platform)
 
         # 状态
         self.state = "idle"
         self.state_timer = pygame.time.get_ticks()
         self.state_duration = random.randint(3000, 8000)
+        self.prefetch_next_states()
 
         # 动画
         self.animation_frame = 0.0
@@ -93,11 +99,18 @@ class DesktopPetImage:
         self.bubble_duration = 3000
 
         # 鼠标交互
+        self.drawn_sprite = None  # 最近一次绘制的 (帧, 位置)，用于点击检测
         self.mouse_over = False
         self.click_timer = 0
 
         self.warned_once = {}  # 防止重复打印警告
 
+        # 字体在后台线程中解析，画好的气泡按 (文字, 窗口宽度, 字体) 缓存
+        self.font_manager = get_font_manager()
+        self.font_manager.resolve_in_background()
+        self.bubble_font_size = 14
+        self.bubble_cache = BubbleCache(self.render_bubble)
+
         self.dialogs = [
             "你好呀！我是洛天依~",
             "今天天气真好呢！",
@@ -111,37 +124,127 @@ class DesktopPetImage:
             "我在这里陪着你呢~",
         ]
 
-        self.clock = pygame.time.Clock()
+        # 只重绘变化的区域，背景用 colorkey 颜色填充（这个颜色会被透明掉）
+        self.renderer = DirtyRectRenderer(self.colorkey)
+
+        # 拖拽、行走时全速运行，其余时间按计时器按需唤醒
+        self.scheduler = FrameScheduler(active_fps=60, idle_fps=4)
         self.running = True
 
-    def update_position(self):
-        win32gui.SetWindowPos(
-            self.hwnd,
-            win32con.HWND_TOPMOST,
-            int(self.x),
-            int(self.y),
-            self.window_width,
-            self.window_height,
-            0,
+    def load_character(self):
+        """按当前尺寸加载角色，并把精灵转换成显示格式"""
+        self.character = self.create_character(
+            self.pet_width, self.pet_height, self.use_animation
+        )
+        # 也可以传入 self.colorkey 预先合成为不透明图，
+        # 但 SDL 软件渲染下不透明 blit 反而比 alpha blit 慢（见 benchmarks/bench_blit.py）
+        self.character.finalize_sprites()
+
+    def create_character(self, width, height, use_animation):
+        if use_animation:
+            character = AnimatedCharacter(
+                "images",
+                width,
+                height,
+                frame_delay=100,
+                lazy=self.lazy_sprites,
+                memory_budget=self.sprite_memory_budget,
+                stream_threshold=self.stream_threshold,
+                one_shot=self.one_shot_states,
+            )
+        else:
+            character = ImageCharacter(
+                "images",
+                width,
+                height,
+                lazy=self.lazy_sprites,
+                memory_budget=self.sprite_memory_budget,
+            )
+        # 调整大小、切换动画后保持原来的配色
+        character.set_palette(self.palette)
+        return character
+
+    def load_character_async(self, width, height, use_animation):
+        """
+        在后台线程创建新的角色（图片从内存中的分辨率金字塔重新采样），
+        准备好之前继续显示旧的精灵，由 update_pending_character() 切换
+        """
+        future = self.loader_thread.submit(
+            self.create_character, width, height, use_animation
         )
+        self.pending_character = (width, height, use_animation, future)
+
+    def update_assets(self):
+        """检查 images/ 目录，只重新加载有变化的文件"""
+        changed = self.asset_watcher.poll(pygame.time.get_ticks())
+        if changed:
+            self.character.reload_files(changed)
+
+    def update_pending_character(self):
+        """后台创建的角色当前状态的帧已经就绪时，调整窗口并换上新角色"""
+        if self.pending_character is None:
+            return
+        width, height, use_animation, future = self.pending_character
+        if not future.done():
+            return
+        try:
+            character = future.result()
+        except Exception as e:
+            print(f"Failed to load character: {e}")
+            self.pending_character = None
+            return
+        if not character.is_ready(self.state):
+            return
+        self.pending_character = None
+
+        if (width, height) != (self.pet_width, self.pet_height):
+            self.pet_width = width
+            self.pet_height = height
+            self.window_width = self.pet_width
+            self.window_height = self.pet_height + self.bubble_area_height
+
+            # 先设置新的窗口大小
+            self.screen = pygame.display.set_mode(
+                (self.window_width, self.window_height),
+                pygame.NOFRAME | pygame.SRCALPHA,
+            )
+            self.bubble_cache.clear()
+
+            # 重新获取窗口句柄并设置属性
+            self.platform.attach(self.window_width, self.window_height, self.colorkey)
+            self.platform.move_window(self.x, self.y)
+
+        self.use_animation = use_animation
+        self.character = character
+        self.character.finalize_sprites()
+        self.renderer.invalidate()
 
-    def handle_events(self):
-        for event in pygame.event.get():
+    def update_position(self):
+        self.platform.move_window(self.x, self.y)
+
+    def update_drag(self, force=False):
+        """把这一帧的拖拽合并成一次窗口移动"""
+        pos = self.drag.flush(pygame.time.get_ticks(), force)
+        if pos is not None:
+            self.x, self.y = pos
+
+    def handle_events(self, events):
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
 
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_x, mouse_y = event.pos
-
                 if event.button == 1:
-                    # 点击区域：角色所在区域
-                    pet_rect = pygame.Rect(
-                        0, self.bubble_area_height, self.pet_width, self.pet_height
-                    )
-                    if pet_rect.collidepoint(mouse_x, mouse_y):
+                    # 只有点在角色不透明的像素上才算点中，透明的空白处不会抓起角色
+                    if self.hit_pet(event.pos):
                         self.dragging = True
-                        # 记录鼠标在屏幕上的绝对位置
-                        self.drag_start_x, self.drag_start_y = win32api.GetCursorPos()
+                        # 用屏幕绝对坐标计算偏移，避免窗口坐标跳动
+                        self.drag.start(
+                            self.x,
+                            self.y,
+                            self.screen_width - self.window_width,
+                            self.screen_height - self.window_height,
+                        )
                         self.state = "surprise"
                         self.state_timer = pygame.time.get_ticks()
                         self.show_bubble("哎呀！别抓我~")
@@ -151,6 +254,7 @@ class DesktopPetImage:
 
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1 and self.dragging:
+                    self.update_drag(force=True)
                     self.dragging = False
                     self.state = "happy"
                     self.state_timer = pygame.time.get_ticks()
@@ -158,41 +262,39 @@ class DesktopPetImage:
 
             elif event.type == pygame.MOUSEMOTION:
                 if self.dragging:
-                    # 用屏幕绝对坐标计算偏移，避免窗口坐标跳动
-                    cur_x, cur_y = win32api.GetCursorPos()
-                    dx = cur_x - self.drag_start_x
-                    dy = cur_y - self.drag_start_y
-
-                    self.x += dx
-                    self.y += dy
-
-                    # 限制在屏幕范围内
-                    self.x = max(0, min(self.x, self.screen_width - self.window_width))
-                    self.y = max(
-                        0, min(self.y, self.screen_height - self.window_height)
-                    )
-
-                    self.update_position()
-
-                    self.drag_start_x = cur_x
-                    self.drag_start_y = cur_y
+                    self.drag.motion()
 
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
 
+            elif event.type == pygame.WINDOWEXPOSED:
+                # 窗口被遮挡后重新露出，内容需要整窗重绘
+                self.renderer.invalidate()
+
+        if self.dragging:
+            self.update_drag()
+
     def update_state(self):
         current_time = pygame.time.get_ticks()
 
         if self.dragging:
             return
 
+        # 一次性动画播完后直接切换到它指定的下一个状态
+        next_state = self.character.next_state(self.state, current_time)
+        if next_state is not None:
+            self.state = next_state
+            self.state_timer = current_time
+            self.state_duration = random.randint(3000, 8000)
+            self.prefetch_next_states()
+
         if current_time - self.state_timer > self.state_duration:
             self.state_timer = current_time
 
             if self.state == "idle":
-                next_states = ["walk", "sit", "happy", "sleep"]
-                weights = [0.4, 0.3, 0.2, 0.1]
+                next_states = list(self.IDLE_TRANSITIONS)
+                weights = list(self.IDLE_TRANSITIONS.values())
                 self.state = random.choices(next_states, weights=weights)[0]
 
                 if self.state == "walk":
@@ -214,12 +316,23 @@ class DesktopPetImage:
                 self.state = "idle"
                 self.state_duration = random.randint(3000, 8000)
 
+            self.prefetch_next_states()
+
         # 气泡消失
         if self.bubble_text and current_time - self.bubble_timer > self.bubble_duration:
             self.bubble_text = ""
 
         self.animation_frame += self.animation_speed
 
+    def prefetch_next_states(self):
+        """在后台预加载当前状态和接下来最可能出现的状态"""
+        if self.state == "idle":
+            transitions = self.IDLE_TRANSITIONS
+            next_states = sorted(transitions, key=transitions.get, reverse=True)
+        else:
+            next_states = ["idle"]
+        self.character.prefetch([self.state] + next_states)
+
     def show_bubble(self, text):
         self.bubble_text = text
         self.bubble_timer = pygame.time.get_ticks()
@@ -256,61 +369,18 @@ class DesktopPetImage:
         def set_size(new_width):
             # 固定比例 1.4 (280/200)
             ratio = 1.4
-            self.pet_width = new_width
-            self.pet_height = int(new_width * ratio)
-            self.window_width = self.pet_width
-            self.window_height = self.pet_height + self.bubble_area_height
-            
-            # 先设置新的窗口大小
-            self.screen = pygame.display.set_mode(
-                (self.window_width, self.window_height),
-                pygame.NOFRAME | pygame.SRCALPHA,
+            self.load_character_async(
+                new_width, int(new_width * ratio), self.use_animation
             )
-            
-            # 重新获取窗口句柄并设置属性
-            self.hwnd = pygame.display.get_wm_info()["window"]
-            win32gui.SetWindowLong(
-                self.hwnd,
-                win32con.GWL_EXSTYLE,
-                win32gui.GetWindowLong(self.hwnd, win32con.GWL_EXSTYLE)
-                | win32con.WS_EX_LAYERED,
-            )
-            win32gui.SetLayeredWindowAttributes(
-                self.hwnd,
-                win32api.RGB(*self.colorkey),
-                0,
-                win32con.LWA_COLORKEY,
-            )
-            win32gui.SetWindowPos(
-                self.hwnd,
-                win32con.HWND_TOPMOST,
-                int(self.x),
-                int(self.y),
-                self.window_width,
-                self.window_height,
-                0,
-            )
-            
-            # 然后重新加载角色图片（使用新尺寸）
-            if self.use_animation:
-                self.character = AnimatedCharacter(
-                    "images", self.pet_width, self.pet_height, frame_delay=100
-                )
-            else:
-                self.character = ImageCharacter(
-                    "images", self.pet_width, self.pet_height
-                )
 
         def toggle_animation():
-            self.use_animation = not self.use_animation
-            if self.use_animation:
-                self.character = AnimatedCharacter(
-                    "images", self.pet_width, self.pet_height, frame_delay=100
-                )
-            else:
-                self.character = ImageCharacter(
-                    "images", self.pet_width, self.pet_height
-                )
+            self.load_character_async(
+                self.pet_width, self.pet_height, not self.use_animation
+            )
+
+        def set_palette(name):
+            self.palette = name
+            self.character.set_palette(name)
 
         def show_about():
             messagebox.showinfo("About", "Luotianyi Desktop Pet v1.0")
@@ -337,6 +407,15 @@ class DesktopPetImage:
         size_menu.add_command(label="大 (280)", command=lambda: set_size(280))
         menu.add_cascade(label="调整大小", menu=size_menu)
         
+        # 配色子菜单：换色后的帧在显示时才生成
+        palette_menu = tk.Menu(menu, tearoff=0)
+        palette_menu.add_command(label="原色", command=lambda: set_palette(None))
+        for name in self.character.palettes:
+            palette_menu.add_command(
+                label=name, command=lambda name=name: set_palette(name)
+            )
+        menu.add_cascade(label="配色", menu=palette_menu)
+
         menu.add_command(
             label=f"{'关闭' if self.use_animation else '开启'}动画",
             command=toggle_animation,
@@ -347,64 +426,74 @@ class DesktopPetImage:
         menu.add_command(label="退出", command=exit_app)
 
         try:
-            x, y = win32api.GetCursorPos()
+            x, y = self.platform.get_cursor_pos()
             menu.tk_popup(x, y, 0)
         finally:
             root.update()
 
     def draw(self):
-        # 用 colorkey 颜色填充背景（这个颜色会被透明掉）
-        self.screen.fill(self.colorkey)
-
         current_time = pygame.time.get_ticks()
 
         if self.use_animation:
-            sprite = self.character.get_sprite(self.state, current_time)
+            frame = self.character.get_sprite(self.state, current_time)
         else:
-            sprite = self.character.get_sprite(self.state)
+            frame = self.character.get_sprite(self.state)
 
-        # 角色绘制在气泡区域下方
-        draw_x = 0
-        draw_y = self.bubble_area_height
+        # 角色绘制在气泡区域下方，图集中的帧只包含不透明区域，要加上它的偏移
+        draw_x = frame.offset[0]
+        draw_y = self.bubble_area_height + frame.offset[1]
 
         if self.state == "walk":
             offset = int(math.sin(self.animation_frame) * 5)
-            self.screen.blit(sprite, (draw_x + offset, draw_y))
+            sprite_pos = (draw_x + offset, draw_y)
         else:
-            self.screen.blit(sprite, (draw_x, draw_y))
+            sprite_pos = (draw_x, draw_y)
 
-        if self.bubble_text:
-            self.draw_bubble(self.bubble_text)
+        def draw_scene(screen):
+            rects = [screen.blit(frame.surface, sprite_pos)]
+            if self.bubble_text:
+                rects.append(self.draw_bubble(self.bubble_text))
+            return rects
 
-        pygame.display.flip()
+        self.renderer.render(
+            self.screen, (frame, sprite_pos, self.bubble_text), draw_scene
+        )
+        self.drawn_sprite = (frame, sprite_pos)
+
+        if "full quality" not in self.startup_times:
+            self.log_startup("first frame")
+            if self.character.is_ready(self.state):
+                self.log_startup("full quality")
+
+    def hit_pet(self, pos):
+        """窗口坐标 pos 是否落在最近一次绘制的角色的不透明像素上"""
+        if self.drawn_sprite is None:
+            return False
+        frame, sprite_pos = self.drawn_sprite
+        return frame.hit_test(sprite_pos, pos)
+
+    def log_startup(self, milestone):
+        """记录启动到某个阶段的耗时，每个阶段只记一次，便于逐版本对比"""
+        if milestone not in self.startup_times:
+            elapsed = (time.perf_counter() - self.startup_start) * 1000
+            self.startup_times[milestone] = elapsed
+            print(f"Startup: {milestone} after {elapsed:.0f} ms")
 
     def draw_bubble(self, text):
-        try:
-            font = pygame.font.SysFont("simhei", 14)
-        except Exception:
-            font = pygame.font.SysFont(None, 18)
-
-        # 中文逐字换行
-        lines = []
-        current_line = ""
-        max_width = self.window_width - 20
-
-        for char in text:
-            test_line = current_line + char
-            if font.size(test_line)[0] <= max_width:
-                current_line = test_line
-            else:
-                lines.append(current_line)
-                current_line = char
-
-        if current_line:
-            lines.append(current_line)
+        font = self.font_manager.get(self.bubble_font_size)
+        bubble_surf = self.bubble_cache.get(text, self.window_width, font)
+        bubble_x = (self.window_width - bubble_surf.get_width()) // 2
+        bubble_y = max(0, self.bubble_area_height - bubble_surf.get_height() - 5)
+        return self.screen.blit(bubble_surf, (bubble_x, bubble_y))
+
+    def render_bubble(self, text, window_width, font):
+        """画出完整的气泡（背景、边框、文字），结果由 bubble_cache 缓存"""
+        max_width = window_width - 20
+        lines = wrap_text(text, font, max_width)
 
         line_height = 20
         bubble_height = len(lines) * line_height + 12
-        bubble_width = min(max_width + 16, self.window_width)
-        bubble_x = (self.window_width - bubble_width) // 2
-        bubble_y = max(0, self.bubble_area_height - bubble_height - 5)
+        bubble_width = min(max_width + 16, window_width)
 
         # 气泡背景
         bubble_surf = pygame.Surface((bubble_width, bubble_height), pygame.SRCALPHA)
@@ -421,25 +510,43 @@ class DesktopPetImage:
             2,
             border_radius=8,
         )
-        self.screen.blit(bubble_surf, (bubble_x, bubble_y))
 
         # 气泡文字
         for i, line in enumerate(lines):
             text_surface = font.render(line, True, (0, 0, 0))
             text_rect = text_surface.get_rect(
                 center=(
-                    self.window_width // 2,
-                    bubble_y + 8 + i * line_height + line_height // 2,
+                    bubble_width // 2,
+                    8 + i * line_height + line_height // 2,
                 )
             )
-            self.screen.blit(text_surface, text_rect)
+            bubble_surf.blit(text_surface, text_rect)
+
+        return bubble_surf
+
+    def is_active(self):
+        """拖拽和行走需要连续动画，其余状态画面只在计时器到期时变化"""
+        return self.dragging or self.state == "walk"
+
+    def next_deadlines(self):
+        """下一次状态切换、气泡消失、动画换帧、图片加载或角色切换的时间"""
+        deadlines = [self.state_timer + self.state_duration + 1]
+        if self.bubble_text:
+            deadlines.append(self.bubble_timer + self.bubble_duration + 1)
+        # 动画换帧，或者当前状态的图片还在后台加载
+        deadlines.append(self.character.next_frame_time(self.state))
+        if self.pending_character is not None:
+            deadlines.append(pygame.time.get_ticks() + LOAD_POLL_INTERVAL)
+        return deadlines
 
     def run(self):
         while self.running:
-            self.handle_events()
+            events = self.scheduler.wait(self.is_active(), self.next_deadlines())
+            self.handle_events(events)
             self.update_state()
+            self.update_assets()
+            self.update_pending_character()
             self.draw()
-            self.clock.tick(60)
 
         pygame.quit()
         sys.exit()
@@ -0,0 +1,57 @@
+"""
+脏矩形渲染器
+只重绘、提交发生变化的区域，画面没有变化的帧直接跳过
+"""
+
+import pygame
+
+
+class DirtyRectRenderer:
+    def __init__(self, background):
+        self.background = background
+        self._last_key = None
+        self._last_rects = []
+        self._full_redraw = True
+
+        # 统计信息，方便确认空闲时的开销
+        self.presented_frames = 0
+        self.skipped_frames = 0
+
+    def invalidate(self):
+        """下一帧整窗重绘（窗口创建、调整大小后调用）"""
+        self._full_redraw = True
+        self._last_key = None
+        self._last_rects = []
+
+    def render(self, surface, key, draw_scene):
+        """
+        key 描述当前画面（精灵、位置、气泡等），与上一帧相同则跳过。
+        draw_scene(surface) 负责绘制所有元素，并返回它们占用的矩形列表。
+        返回本帧是否提交了画面。
+        """
+        if not self._full_redraw and key == self._last_key:
+            self.skipped_frames += 1
+            return False
+
+        if self._full_redraw:
+            surface.fill(self.background)
+        else:
+            # 擦掉上一帧各元素所在的区域，其余像素保持不变
+            for rect in self._last_rects:
+                surface.fill(self.background, rect)
+
+        rects = [
+            pygame.Rect(rect).clip(surface.get_rect()) for rect in draw_scene(surface)
+        ]
+        rects = [rect for rect in rects if rect.width and rect.height]
+
+        if self._full_redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self._last_rects + rects)
+
+        self._full_redraw = False
+        self._last_key = key
+        self._last_rects = rects
+        self.presented_frames += 1
+        return True
@@ -0,0 +1,93 @@
+"""
+矢量角色的显示列表
+绘图代码不直接画到某个尺寸的图片上，而是把 ImageDraw 调用（椭圆、折线、多边形……）
+按设计尺寸记录下来；需要某个尺寸时再按比例光栅化，同一份列表可以画出任意大小
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw
+
+# 随指令一起缩放的线宽、圆角半径参数
+_LENGTH_ARGS = ("width", "radius")
+
+# 至少有这么多层要画时才启动进程池：200 像素的一层不到 1ms，
+# 层少时进程启动的开销比绘制本身还大（见 benchmarks/bench_cycles.py）
+MIN_PARALLEL = 128
+
+
+class DisplayList:
+    """接口和 ImageDraw.Draw 相同，只记录调用，不画任何像素"""
+
+    def __init__(self, design_size):
+        self.design_size = design_size
+        self.ops = []
+
+    def ellipse(self, xy, **kwargs):
+        self.ops.append(("ellipse", xy, kwargs))
+
+    def rounded_rectangle(self, xy, **kwargs):
+        self.ops.append(("rounded_rectangle", xy, kwargs))
+
+    def line(self, xy, **kwargs):
+        self.ops.append(("line", xy, kwargs))
+
+    def arc(self, xy, **kwargs):
+        self.ops.append(("arc", xy, kwargs))
+
+    def polygon(self, xy, **kwargs):
+        self.ops.append(("polygon", xy, kwargs))
+
+    def digest(self):
+        """指令内容的哈希，绘图代码改了哈希就会变"""
+        return hashlib.sha1(repr(self.ops).encode("utf-8")).hexdigest()
+
+    def rasterize(self, size):
+        """按 size×size 光栅化，返回 RGBA 图片；设计尺寸下和直接用 ImageDraw 画的完全一样"""
+        img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+        self.draw_into(ImageDraw.Draw(img), size)
+        return img
+
+    def draw_into(self, draw, size):
+        """按 size×size 画到已有的 ImageDraw 上"""
+        scale = size / self.design_size
+        origin = self.design_size // 2
+        center = size // 2
+
+        def point(v):
+            return round((v - origin) * scale + center)
+
+        def length(v):
+            return max(1, round(v * scale))
+
+        for name, xy, kwargs in self.ops:
+            if isinstance(xy[0], tuple):
+                xy = [(point(x), point(y)) for x, y in xy]
+            else:
+                xy = [point(v) for v in xy]
+            kwargs = {
+                key: length(value) if key in _LENGTH_ARGS else value
+                for key, value in kwargs.items()
+            }
+            getattr(draw, name)(xy, **kwargs)
+
+
+def _rasterize(display_list, size):
+    return display_list.rasterize(size)
+
+
+def rasterize_all(display_lists, size, workers=None):
+    """
+    光栅化多个显示列表，返回各自的 RGBA 图片。
+    ImageDraw 绘制时不释放 GIL，层多且有多个 CPU 时用进程池并行；
+    workers 为 None 时自动决定，为 0 时在当前进程里画
+    """
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = cpus if cpus > 1 and len(display_lists) >= MIN_PARALLEL else 0
+    if workers < 1 or not display_lists:
+        return [display_list.rasterize(size) for display_list in display_lists]
+    with ProcessPoolExecutor(max_workers=min(workers, len(display_lists))) as pool:
+        return list(pool.map(_rasterize, display_lists, [size] * len(display_lists)))
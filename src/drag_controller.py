@@ -0,0 +1,88 @@
+"""
+拖拽控制
+一帧内的所有 MOUSEMOTION 合并成一次窗口移动，位置没变就不移动，
+并且移动频率不超过显示器刷新率
+"""
+
+import pygame
+
+
+class DragController:
+    def __init__(self, backend, refresh_rate=None):
+        """
+        backend 需要提供：
+          get_cursor_pos() -> (x, y)  光标在屏幕上的坐标
+          move_window(x, y)           把窗口移动到屏幕坐标 (x, y)
+        """
+        self.backend = backend
+        if refresh_rate is None:
+            refresh_rate = 60
+            if hasattr(pygame.display, "get_current_refresh_rate"):
+                refresh_rate = pygame.display.get_current_refresh_rate() or 60
+        # get_ticks() 是整数毫秒，60Hz 下帧间隔为 16~17ms，所以向下取整
+        self.min_interval = int(1000 / refresh_rate)
+
+        self._pending = False
+        self._last_move_time = None
+        self._cursor = (0, 0)
+        self._x = 0.0
+        self._y = 0.0
+        self._max_x = 0
+        self._max_y = 0
+        self._window_pos = None
+
+        # 统计信息
+        self.motion_events = 0
+        self.moves = 0
+        self.skipped_moves = 0
+
+    def start(self, x, y, max_x, max_y):
+        """开始拖拽，记录窗口当前位置和允许移动的范围"""
+        self._cursor = self.backend.get_cursor_pos()
+        self._x = x
+        self._y = y
+        self._max_x = max_x
+        self._max_y = max_y
+        self._window_pos = (int(x), int(y))
+        self._pending = False
+        self._last_move_time = None
+
+    def motion(self):
+        """收到一个 MOUSEMOTION，只做标记，真正的移动在 flush() 里"""
+        self._pending = True
+        self.motion_events += 1
+
+    def flush(self, now, force=False):
+        """
+        每帧调用一次：读取一次光标位置，把窗口移动到最终位置。
+        返回新的窗口位置，没有移动时返回 None。
+        """
+        if not self._pending:
+            return None
+        if (
+            not force
+            and self._last_move_time is not None
+            and now - self._last_move_time < self.min_interval
+        ):
+            return None
+        self._pending = False
+
+        cur_x, cur_y = self.backend.get_cursor_pos()
+        self._x += cur_x - self._cursor[0]
+        self._y += cur_y - self._cursor[1]
+        self._cursor = (cur_x, cur_y)
+
+        # 限制在屏幕范围内
+        self._x = max(0, min(self._x, self._max_x))
+        self._y = max(0, min(self._y, self._max_y))
+
+        pos = (int(self._x), int(self._y))
+        if pos == self._window_pos:
+            self.skipped_moves += 1
+            return None
+
+        self.backend.move_window(*pos)
+        self._window_pos = pos
+        self._last_move_time = now
+        self.moves += 1
+        return pos
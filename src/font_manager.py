@@ -0,0 +1,180 @@
+"""
+全局字体管理
+启动时（或在后台线程里）解析一次字体，按 中文字体 → emoji 字体 → 默认字体 的顺序回退，
+并按码位缓存每个字符由哪个字体绘制
+"""
+
+import threading
+
+import pygame
+import pygame.freetype
+
+# 按优先级排列的候选字体名（pygame.font.match_font 使用的名字）
+CJK_FONT_NAMES = [
+    "simhei",
+    "microsoftyahei",
+    "msyh",
+    "notosanscjksc",
+    "notosanscjk",
+    "notosanssc",
+    "sourcehansanssc",
+    "wenquanyimicrohei",
+    "wqymicrohei",
+    "wenquanyizenhei",
+    "wqyzenhei",
+    "droidsansfallback",
+    "arplumingcn",
+]
+EMOJI_FONT_NAMES = [
+    "seguiemj",
+    "segoeuiemoji",
+    "notoemoji",
+    "notocoloremoji",
+    "symbola",
+    "applecoloremoji",
+]
+
+
+class FontChain:
+    """同一字号下的一组回退字体，按字符选择能绘制它的字体"""
+
+    def __init__(self, fonts, probes):
+        # fonts: [pygame.font.Font]，probes: 对应的 freetype 字体，用来查询字形是否存在
+        self.fonts = fonts
+        self.probes = probes
+        self._font_for_char = {}
+
+    def font_for(self, char):
+        font = self._font_for_char.get(char)
+        if font is not None:
+            return font
+
+        font = self.fonts[-1]
+        for candidate, probe in zip(self.fonts, self.probes):
+            if probe is None or probe.get_metrics(char)[0] is not None:
+                font = candidate
+                break
+
+        self._font_for_char[char] = font
+        return font
+
+    def runs(self, text):
+        """把文本切分成 [(font, 片段)]，相邻同字体的字符合并成一段"""
+        runs = []
+        current_font = None
+        start = 0
+        for i, char in enumerate(text):
+            font = self.font_for(char)
+            if font is not current_font:
+                if current_font is not None:
+                    runs.append((current_font, text[start:i]))
+                current_font = font
+                start = i
+        if current_font is not None:
+            runs.append((current_font, text[start:]))
+        return runs
+
+    def metrics(self, text):
+        """与 pygame.font.Font.metrics 相同的格式，每个字符用各自的字体测量"""
+        result = []
+        for font, run in self.runs(text):
+            result.extend(font.metrics(run))
+        return result
+
+    def size(self, text):
+        width = 0
+        for font, run in self.runs(text):
+            width += font.size(run)[0]
+        return width, self.get_height()
+
+    def get_height(self):
+        return max(font.get_height() for font in self.fonts)
+
+    def render(self, text, antialias, color):
+        pieces = [font.render(run, antialias, color) for font, run in self.runs(text)]
+        if len(pieces) == 1:
+            return pieces[0]
+
+        height = self.get_height()
+        surface = pygame.Surface(
+            (sum(p.get_width() for p in pieces), height), pygame.SRCALPHA
+        )
+        x = 0
+        for piece in pieces:
+            # 不同字体高度不一，垂直居中对齐
+            surface.blit(piece, (x, (height - piece.get_height()) // 2))
+            x += piece.get_width()
+        return surface
+
+
+class FontManager:
+    def __init__(self, cjk_names=CJK_FONT_NAMES, emoji_names=EMOJI_FONT_NAMES):
+        self.cjk_names = cjk_names
+        self.emoji_names = emoji_names
+        self._paths = None
+        self._resolved = threading.Event()
+        self._lock = threading.Lock()
+        self._chains = {}
+
+    def resolve(self):
+        """查找字体文件路径，第一次调用会扫描系统字体目录"""
+        with self._lock:
+            if self._paths is None:
+                paths = []
+                for names in (self.cjk_names, self.emoji_names):
+                    path = pygame.font.match_font(names)
+                    if path and path not in paths:
+                        paths.append(path)
+                self._paths = paths
+                self._resolved.set()
+        return self._paths
+
+    def resolve_in_background(self):
+        """在后台线程里扫描字体，避免阻塞第一帧"""
+        thread = threading.Thread(target=self.resolve, daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, size):
+        """返回指定字号的 FontChain，同一字号只创建一次"""
+        chain = self._chains.get(size)
+        if chain is not None:
+            return chain
+
+        if not self._resolved.is_set():
+            self.resolve()
+
+        if not pygame.freetype.get_init():
+            pygame.freetype.init()
+
+        fonts = []
+        probes = []
+        for path in self._paths:
+            try:
+                font = pygame.font.Font(path, size)
+                probe = pygame.freetype.Font(path, size)
+            except Exception as e:
+                # 位图 emoji 字体等可能无法按任意字号加载
+                print(f"Failed to load font {path}: {e}")
+                continue
+            fonts.append(font)
+            probes.append(probe)
+
+        # 最后一级回退：pygame 自带的默认字体，总能绘制
+        fonts.append(pygame.font.Font(None, size))
+        probes.append(None)
+
+        chain = FontChain(fonts, probes)
+        self._chains[size] = chain
+        return chain
+
+
+_font_manager = None
+
+
+def get_font_manager():
+    """进程内共享的字体管理器"""
+    global _font_manager
+    if _font_manager is None:
+        _font_manager = FontManager()
+    return _font_manager
@@ -0,0 +1,58 @@
+"""
+自适应帧率调度器
+拖拽、行走时全速运行，其余时间阻塞等待输入或下一个计时器到期
+"""
+
+import math
+from collections import deque
+
+import pygame
+
+
+class FrameScheduler:
+    def __init__(self, active_fps=60, idle_fps=4):
+        self.active_fps = active_fps
+        # 空闲时最长的等待时间，保证每秒至少唤醒几次
+        self.idle_interval = 1000 / idle_fps
+        self.clock = pygame.time.Clock()
+        self._wakeups = deque()
+
+    def wait(self, active, deadlines=()):
+        """
+        等待到下一次需要更新的时刻，返回期间收到的事件。
+        active 为真时按 active_fps 固定帧率运行；
+        否则阻塞在 pygame.event.wait() 上，直到有输入或最早的 deadline 到期。
+        """
+        if active:
+            self.clock.tick(self.active_fps)
+            events = pygame.event.get()
+        else:
+            now = pygame.time.get_ticks()
+            timeout = self.idle_interval
+            for deadline in deadlines:
+                if deadline is not None:
+                    timeout = min(timeout, deadline - now)
+
+            if timeout > 0:
+                # pygame.event.wait(0) 会一直阻塞，所以至少等待 1ms
+                event = pygame.event.wait(max(1, math.ceil(timeout)))
+                events = [] if event.type == pygame.NOEVENT else [event]
+                events.extend(pygame.event.get())
+            else:
+                events = pygame.event.get()
+
+            # 让时钟跟上当前时间，切回全速时不会补帧
+            self.clock.tick()
+
+        self._record_wakeup()
+        return events
+
+    def _record_wakeup(self):
+        now = pygame.time.get_ticks()
+        self._wakeups.append(now)
+        while self._wakeups and now - self._wakeups[0] > 60000:
+            self._wakeups.popleft()
+
+    def wakeups_per_minute(self):
+        """最近一分钟内的唤醒次数"""
+        return len(self._wakeups)
@@ -0,0 +1,81 @@
+"""
+长动画的流式播放
+帧数很多的状态不整段解码进内存，而是由线程池提前解码当前帧之后的几帧，
+放进固定大小的环形缓冲区；主线程只取已经解码好的帧，来不及时重复显示上一帧，不会卡住主循环
+"""
+
+import os
+from concurrent.futures import Future
+
+
+class FrameStream:
+    def __init__(self, character, filepaths, ahead=8):
+        """
+        character 提供 _submit_stream_frame / _finish_stream_frame，
+        和懒加载、热重载走同一套解码流程（资源包、磁盘缓存、线程池），有配色时顺便换色。
+        ahead: 提前解码的帧数，缓冲区里最多保留 ahead + 1 帧
+        """
+        self.character = character
+        self.filepaths = filepaths
+        self.ahead = min(ahead, len(filepaths) - 1)
+        self._buffer = {}  # 帧序号 -> 转换好格式的 SpriteFrame 或解码中的 Future
+        self._failed = set()
+        self._last = None
+
+        # 统计信息
+        self.underruns = 0
+        self.decoded = 0
+
+    def __len__(self):
+        return len(self.filepaths)
+
+    def frame(self, index):
+        """
+        在主线程调用：返回第 index 帧，并把后面几帧提交给线程池。
+        这一帧还没解码好时返回上一次显示的帧（还没有显示过任何帧时返回 None）
+        """
+        index %= len(self.filepaths)
+        self._fill(index)
+        item = self._buffer.get(index)
+        if isinstance(item, Future):
+            if not item.done():
+                self.underruns += 1
+                return self._last
+            filepath = self.filepaths[index]
+            try:
+                frame = self.character._finish_stream_frame(filepath, item)
+            except Exception as e:
+                filename = os.path.basename(filepath)
+                print(f"Failed to load animation frame {filename}: {e}")
+                self._failed.add(index)
+                del self._buffer[index]
+                return self._last
+            item = self._buffer[index] = frame
+            self.decoded += 1
+        if item is not None:
+            self._last = item
+        return self._last
+
+    def _fill(self, index):
+        """保证 index 和之后 ahead 帧都已经提交解码，丢掉窗口以外（已经播放过）的帧"""
+        count = len(self.filepaths)
+        window = [(index + i) % count for i in range(self.ahead + 1)]
+        for old in set(self._buffer) - set(window):
+            del self._buffer[old]
+        for wanted in window:
+            if wanted not in self._buffer and wanted not in self._failed:
+                filepath = self.filepaths[wanted]
+                self._buffer[wanted] = self.character._submit_stream_frame(filepath)
+
+    @property
+    def buffered(self):
+        """缓冲区里已经解码好的帧数"""
+        return sum(
+            1
+            for item in self._buffer.values()
+            if not isinstance(item, Future) or item.done()
+        )
+
+    def reset(self):
+        """丢弃缓冲区（显示格式、配色改变时）"""
+        self._buffer.clear()
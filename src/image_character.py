@@ -1,65 +1,499 @@
 import pygame
 import os
+from concurrent.futures import Future
+from sprite_atlas import SpriteAtlas, SpriteFrame
+from sprite_cache import get_sprite_cache
+from image_decoder import (
+    SCALE_ALGORITHM,
+    DecodedImage,
+    decode_frames,
+    decode_preview,
+    get_decode_pool,
+)
+from state_loader import StateLoader
+from asset_watcher import IMAGE_EXTENSIONS
+from asset_pack import default_pack_path, open_pack
+from frame_stream import FrameStream
+from animation_source import SHEET_SUFFIX, find_animation_file
+from animation_timeline import Timeline
+from palette_swap import PALETTES, VariantCache, decode_recolored, recolor_decoded
+
+
+# 懒加载时，当前状态还在后台解码的话，隔多久再检查一次（毫秒）
+LOAD_POLL_INTERVAL = 30
 
 
 class ImageCharacter:
-    def __init__(self, image_dir="images", width=200, height=280):
+    IMAGE_FILES = {
+        "idle": "idle.png",
+        "walk": "walk.png",
+        "sit": "sit.png",
+        "sleep": "sleep.png",
+        "happy": "happy.png",
+        "surprise": "surprise.png",
+    }
+
+    def __init__(
+        self,
+        image_dir="images",
+        width=200,
+        height=280,
+        use_cache=True,
+        lazy=False,
+        memory_budget=32 * 1024 * 1024,
+        use_pack=True,
+        palettes=None,
+        variant_budget=16 * 1024 * 1024,
+    ):
+        """
+        lazy 为真时启动只扫描文件，每个状态第一次显示时才在后台加载，
+        已加载的帧总大小超过 memory_budget 字节时淘汰最久没用的状态。
+        use_pack 为真且 images.ltpack 里有当前尺寸时，直接从资源包取帧，
+        资源包不存在或没有这个尺寸时读取零散的图片文件。
+        palettes: 可选的配色 {名字: Palette}，默认为 palette_swap.PALETTES；
+        换色后的帧在用到时才生成，总大小不超过 variant_budget 字节，
+        状态被卸载时它的变体一起删掉
+        """
         self.width = width
         self.height = height
         self.image_dir = image_dir
+        self.sprite_cache = get_sprite_cache() if use_cache else None
+        self.pack = None
+        if use_pack:
+            pack = open_pack(default_pack_path(image_dir))
+            if pack is not None and pack.has_size(width, height):
+                self.pack = pack
+        self.lazy = lazy
+        self.loader = StateLoader(self, memory_budget) if lazy else None
+        self.sources = {}
+        self.frame_paths = {}  # 每个状态成功加载的帧对应的文件
+        self._reloads = {}  # 热重载中还在解码的状态
         self.images = {}
+        self.previews = {}  # 懒加载时，完整质量的帧加载完之前显示的预览
         self._default_sprite = None
+        self._default_frame = None
+        self._finalized = False
+        self._colorkey = None
+        self.atlas = None
+        self.palettes = PALETTES if palettes is None else palettes
+        self.palette = None  # 当前配色的名字，None 表示原色
+        self.variants = VariantCache(variant_budget)
         self.load_images()
+        if not lazy:
+            # 懒加载时帧随时进出，每个状态加载后单独打包（见 _pack_state）
+            self.build_atlas()
 
     def load_images(self):
-        if not os.path.exists(self.image_dir):
+        if not os.path.exists(self.image_dir) and self.pack is None:
             print(f"Image directory '{self.image_dir}' not found")
             return
 
-        image_files = {
-            "idle": "idle.png",
-            "walk": "walk.png",
-            "sit": "sit.png",
-            "sleep": "sleep.png",
-            "happy": "happy.png",
-            "surprise": "surprise.png",
+        keys = []
+        for state, filename in self.IMAGE_FILES.items():
+            filepath = os.path.join(self.image_dir, filename)
+            if os.path.exists(filepath) or self._in_pack(filepath):
+                self.sources[("image", state)] = [filepath]
+                keys.append(("image", state))
+            else:
+                print(f"Missing: {filename}")
+
+        if not self.lazy:
+            self._load_states(keys)
+
+    def _load_states(self, keys):
+        """同步加载多个状态，所有帧一起提交给线程池"""
+        submitted = [(key, self._submit_frames(self.sources[key])) for key in keys]
+        for key, items in submitted:
+            frames = self._collect_frames(key, items)
+            if frames:
+                self._install(key, frames)
+
+    def _relpath(self, filepath):
+        """资源包里用相对 images/ 的路径（分隔符为 /）索引帧"""
+        return os.path.relpath(filepath, self.image_dir).replace(os.sep, "/")
+
+    def _in_pack(self, filepath):
+        return self.pack is not None and self._relpath(filepath) in self.pack
+
+    def _pack_sources(self, key):
+        """资源包中某个状态的帧（零散文件不存在时使用）"""
+        if self.pack is None:
+            return []
+        return [
+            os.path.join(self.image_dir, *relpath.split("/"))
+            for relpath in self.pack.states.get(key, ())
+        ]
+
+    def _pack_frames(self, filepath):
+        """资源包中这个文件的帧；零散文件比资源包新（美术改过图）时返回 None，改读文件"""
+        if self.pack is None:
+            return None
+        try:
+            if os.stat(filepath).st_mtime > self.pack.mtime:
+                return None
+        except OSError:
+            pass
+        return self.pack.frames(self._relpath(filepath), self.width, self.height)
+
+    def _submit_frames(self, filepaths, use_pack=True, preview=False):
+        """
+        资源包或磁盘缓存里有的文件直接返回帧列表，
+        都没有的交给线程池解码、缩放，返回 Future（GIF 等动画文件一次解码出所有帧）。
+        preview 为真且第一个文件需要解码时，先提交它的快速预览，返回 (帧列表, 预览的 Future)
+        """
+        items = []
+        preview_future = None
+        pool = get_decode_pool()
+        for i, filepath in enumerate(filepaths):
+            frames = self._cached_frames(filepath, use_pack)
+            if frames is None:
+                if preview and i == 0:
+                    # 线程池按提交顺序执行，预览排在完整质量的帧前面
+                    preview_future = pool.submit(
+                        decode_preview, filepath, self.width, self.height
+                    )
+                frames = pool.submit(decode_frames, filepath, self.width, self.height)
+            items.append(frames)
+        if preview:
+            return items, preview_future
+        return items
+
+    def _cached_frames(self, filepath, use_pack=True):
+        """资源包或磁盘缓存里这个文件的帧列表，都没有时返回 None"""
+        frames = None
+        if use_pack:
+            frames = self._pack_frames(filepath)
+        if frames is None and self.sprite_cache is not None:
+            frame = self.sprite_cache.load(
+                filepath, self.width, self.height, SCALE_ALGORITHM
+            )
+            frames = [frame] if frame is not None else None
+        return frames
+
+    def _wants_preview(self, key):
+        """
+        PNG 的预览和完整解码差不多慢，只在值得时先出预览：
+        动画要等所有帧解码完，JPEG 可以用 draft() 按缩小的尺寸解码
+        """
+        filepaths = self.sources.get(key, ())
+        if not filepaths:
+            return False
+        return key[0] == "anim" or filepaths[0].lower().endswith((".jpg", ".jpeg"))
+
+    def _set_preview(self, key, item):
+        """在主线程换上（item 为 None 时去掉）某个状态完整加载前显示的预览"""
+        if item is None:
+            self.previews.pop(key[1], None)
+            return
+        decoded = item.result()
+        frame = SpriteFrame(
+            pygame.image.frombuffer(decoded.pixels, decoded.size, "RGBA"),
+            decoded.offset,
+            decoded.canvas_size,
+        )
+        self.previews[key[1]] = self._finalize_frame(frame)
+
+    def _collect_frames(self, key, items):
+        """在主线程等待一个状态的所有帧，创建 surface，返回成功加载的帧"""
+        kind, state = key
+        frames = []
+        loaded_paths = []
+        for filepath, item in zip(self.sources[key], items):
+            filename = os.path.basename(filepath)
+            try:
+                file_frames = self._finish_frames(filepath, item)
+            except Exception as e:
+                if kind == "anim":
+                    print(f"Failed to load animation frame {filename}: {e}")
+                else:
+                    print(f"Failed to load {filename}: {e}")
+                continue
+            frames.extend(file_frames)
+            loaded_paths.extend([filepath] * len(file_frames))
+        self.frame_paths[key] = loaded_paths
+
+        if frames:
+            if kind == "anim":
+                print(f"Loaded animation: {state} ({len(frames)} frames)")
+            else:
+                print(f"Loaded: {os.path.basename(self.sources[key][0])}")
+        return frames
+
+    def _finish_frames(self, filepath, item, store=True):
+        """
+        在主线程把一个文件的解码结果包装成 SpriteFrame 列表。
+        store 为假时不写磁盘缓存（流式播放的帧）
+        """
+        if not isinstance(item, Future):
+            return item
+        frames = [
+            SpriteFrame(
+                pygame.image.frombuffer(decoded.pixels, decoded.size, "RGBA"),
+                decoded.offset,
+                decoded.canvas_size,
+                decoded.duration,
+            )
+            for decoded in item.result()
+        ]
+        # 磁盘缓存只保存静态图片，动画文件靠资源包和内存中的金字塔加速
+        if store and self.sprite_cache is not None and len(frames) == 1:
+            self.sprite_cache.store(
+                filepath, self.width, self.height, SCALE_ALGORITHM, frames[0]
+            )
+        return frames
+
+    def _install(self, key, frames):
+        if key[0] == "image":
+            self._uninstall(key)
+            self.images[key[1]] = self._pack_state(frames)[0]
+
+    def _pack_state(self, frames):
+        """
+        懒加载时一个状态的帧单独打包成一页图集，整页只转换一次格式，
+        状态被淘汰时整页一起释放。不是懒加载时原样返回，
+        之后由 build_atlas() 把所有状态打包进同一张图集再转换
+        """
+        if not self.lazy:
+            return frames
+        page = SpriteAtlas(dict(enumerate(frames)))
+        page.surface = self._finalize(page.surface)
+        return [page.region(i) for i in range(len(frames))]
+
+    def _uninstall(self, key):
+        if key[0] == "image" and key[1] in self.images:
+            # 换色后的变体引用着原来的帧，要一起删掉才能真正释放内存
+            self.variants.discard(self.images.pop(key[1]))
+
+    def _frames_of(self, key):
+        """某个来源当前已经加载的帧"""
+        if key[0] == "image" and key[1] in self.images:
+            return [self.images[key[1]]]
+        return []
+
+    def _source_keys(self, filepath):
+        """文件属于哪些来源（不是角色用到的图片时为空）"""
+        directory, filename = os.path.split(os.path.abspath(filepath))
+        if directory == os.path.abspath(self.image_dir):
+            for state, name in self.IMAGE_FILES.items():
+                if name == filename:
+                    return [("image", state)]
+        return []
+
+    def _scan_source(self, key):
+        """重新列出某个来源现在的文件"""
+        filepath = os.path.join(self.image_dir, self.IMAGE_FILES[key[1]])
+        return [filepath] if os.path.exists(filepath) else []
+
+    def reload_files(self, changed):
+        """
+        热重载：changed 是新增、修改或删除的文件。
+        只把这些文件交给线程池重新解码、缩放，同一状态没变的帧直接沿用；
+        解码完成后在主线程两帧之间一次性换上（见 _apply_reloads）
+        """
+        changed = {os.path.abspath(path) for path in changed}
+        # 网格描述改了，对应的精灵表要重新切分
+        changed |= {
+            os.path.splitext(path)[0] + ".png"
+            for path in changed
+            if path.endswith(".json")
         }
+        keys = {key for path in changed for key in self._source_keys(path)}
+        for key in keys:
+            filepaths = self._scan_source(key)
+            self._reloads.pop(key, None)
+            if self.loader is not None and not self._frames_of(key):
+                # 懒加载时还没用到的状态只更新文件列表，用到时再加载
+                self.loader.discard(key)
+                self._set_source(key, filepaths)
+                continue
 
-        for state, filename in image_files.items():
-            filepath = os.path.join(self.image_dir, filename)
-            if os.path.exists(filepath):
+            old = {}
+            loaded = zip(self.frame_paths.get(key, ()), self._frames_of(key))
+            for filepath, frame in loaded:
+                old.setdefault(filepath, []).append(frame)
+            reused = set()
+            items = []
+            for filepath in filepaths:
+                if filepath in old and os.path.abspath(filepath) not in changed:
+                    reused.add(len(items))
+                    items.append(old[filepath])
+                else:
+                    # 资源包里的是修改前的版本，直接读文件
+                    items.extend(self._submit_frames([filepath], use_pack=False))
+            self._reloads[key] = (filepaths, items, reused)
+
+    def _set_source(self, key, filepaths):
+        if filepaths:
+            self.sources[key] = filepaths
+        else:
+            self.sources.pop(key, None)
+
+    def _apply_reloads(self):
+        """把已经解码完成的热重载结果换进 images / animations"""
+        changed = False
+        for key in list(self._reloads):
+            filepaths, items, reused = self._reloads[key]
+            if not all(not isinstance(item, Future) or item.done() for item in items):
+                continue
+            del self._reloads[key]
+            changed = True
+
+            frames = []
+            loaded_paths = []
+            for i, (filepath, item) in enumerate(zip(filepaths, items)):
+                if i in reused:
+                    frames.extend(item)
+                    loaded_paths.extend([filepath] * len(item))
+                    continue
+                filename = os.path.basename(filepath)
                 try:
-                    image = pygame.image.load(filepath)
-                    # 保持原图比例缩放到目标区域内
-                    image = self._scale_keep_ratio(image)
-                    self.images[state] = image
-                    print(f"Loaded: {filename}")
+                    file_frames = self._finish_frames(filepath, item)
                 except Exception as e:
-                    print(f"Failed to load {filename}: {e}")
+                    print(f"Failed to reload {filename}: {e}")
+                    continue
+                frames.extend(file_frames)
+                loaded_paths.extend([filepath] * len(file_frames))
+                print(f"Reloaded: {filename}")
+
+            self._set_source(key, filepaths)
+            self.frame_paths[key] = loaded_paths
+            if frames:
+                self._install(key, frames)
             else:
-                print(f"Missing: {filename}")
+                self._uninstall(key)
+            if self.loader is not None:
+                self.loader.update(key, frames)
 
-    def _scale_keep_ratio(self, image):
-        """缩放图片，保持宽高比，适应目标区域"""
-        orig_w, orig_h = image.get_size()
-        ratio = min(self.width / orig_w, self.height / orig_h)
-        new_w = int(orig_w * ratio)
-        new_h = int(orig_h * ratio)
-        scaled = pygame.transform.smoothscale(image, (new_w, new_h))
+        if changed and self.atlas is not None:
+            # 帧有变化，重新打包图集
+            self.build_atlas()
+            self.atlas.surface = self._finalize(self.atlas.surface)
+            self._use_atlas_regions()
 
-        # 创建目标大小的透明surface，居中放置
-        surf = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        x = (self.width - new_w) // 2
-        y = self.height - new_h  # 底部对齐
-        surf.blit(scaled, (x, y))
-        return surf
+    def _state_key(self, state):
+        """get_sprite(state) 要用到的帧来源"""
+        key = ("image", state)
+        return key if key in self.sources else None
+
+    def _request_state(self, state):
+        if self._reloads:
+            self._apply_reloads()
+        if self.loader is not None:
+            self.loader.poll()
+            key = self._state_key(state)
+            if key is not None:
+                self.loader.request(key)
+
+    def is_ready(self, state):
+        """该状态的帧是否已经可以显示（没有对应图片的状态也算就绪）"""
+        if self.loader is None:
+            return True
+        self._request_state(state)
+        key = self._state_key(state)
+        return key is None or key in self.loader.loaded
+
+    def prefetch(self, states):
+        """懒加载时在后台预先加载接下来可能用到的状态（按可能性从高到低排列）"""
+        if self.loader is not None:
+            self.loader.prefetch([self._state_key(state) for state in states])
+
+    def build_atlas(self):
+        """把所有帧打包进一张图集，之后 images 等字典里保存的是图集中的子区域"""
+        # 原来的帧换成了图集的子区域，按原来的帧生成的变体用不上了
+        self.variants.clear()
+        self.atlas = SpriteAtlas(self._atlas_frames())
+        self._use_atlas_regions()
+
+    def _atlas_frames(self):
+        return {("image", state): frame for state, frame in self.images.items()}
+
+    def _use_atlas_regions(self):
+        for state in self.images:
+            self.images[state] = self.atlas.region(("image", state))
+
+    def finalize_sprites(self, colorkey=None):
+        """
+        把所有精灵转换成显示器的像素格式，避免每次 blit 都做格式转换。
+        必须在 display.set_mode() 之后调用，窗口重建后需要再调用一次。
+        给出 colorkey 时预先合成到该颜色上，之后的 blit 就是普通的内存拷贝。
+        """
+        self._finalized = True
+        self._colorkey = colorkey
+        # 换色后的帧是按旧格式复制的，重新生成
+        self.variants.clear()
+        if self.atlas is not None:
+            # 整张图集只转换一次，再重新切出各帧的子区域
+            self.atlas.surface = self._finalize(self.atlas.surface)
+            self._use_atlas_regions()
+        else:
+            self._finalize_loaded()
+        if self._default_sprite is not None:
+            self._default_sprite = self._finalize(self._default_sprite)
+            self._default_frame = None
+
+    def _finalize_loaded(self):
+        # 懒加载时按状态重新打包，每页转换一次
+        for state, frame in self.images.items():
+            self.images[state] = self._pack_state([frame])[0]
+        for state, frame in self.previews.items():
+            self.previews[state] = self._finalize_frame(frame)
+
+    def _finalize_frame(self, frame):
+        if not self._finalized:
+            return frame
+        return SpriteFrame(
+            self._finalize(frame.surface), frame.offset, frame.size, frame.duration
+        )
+
+    def _finalize(self, image):
+        if not self._finalized:
+            return image
+        if self._colorkey is None:
+            return image.convert_alpha()
+        surf = pygame.Surface(image.get_size())
+        surf.fill(self._colorkey)
+        surf.blit(image, (0, 0))
+        return surf.convert()
 
     def get_sprite(self, state):
+        """返回该状态的 SpriteFrame，绘制时需要加上 frame.offset"""
+        self._request_state(state)
+        return self._recolor(self._static_sprite(state))
+
+    def set_palette(self, name):
+        """换成 palettes 里的另一种配色，None 或不认识的名字恢复原色"""
+        self.palette = name if name in self.palettes else None
+
+    def _recolor(self, frames):
+        """当前配色下的帧（一个 SpriteFrame 或一个状态的帧列表）"""
+        if self.palette is None:
+            return frames
+        return self.variants.get(
+            self.palette, self.palettes[self.palette], frames, self._colorkey
+        )
+
+    def _static_sprite(self, state):
         if state in self.images:
             return self.images[state]
+        if state in self.previews:
+            return self.previews[state]
+
+        if self._default_frame is None:
+            self._default_frame = SpriteFrame(self.get_default_sprite())
+        return self._default_frame
+
+    def next_frame_time(self, state):
+        """下一次需要重绘的时间：当前状态还在后台加载或热重载时，过一会儿再检查"""
+        loading = self.loader is not None and self.loader.is_loading(
+            self._state_key(state)
+        )
+        if loading or self._reloads:
+            return pygame.time.get_ticks() + LOAD_POLL_INTERVAL
+        return None
 
-        # 只在第一次警告
-        return self.get_default_sprite()
+    def next_state(self, state, current_time):
+        """静态图片没有一次性动画，不会自动切换状态"""
+        return None
 
     def get_default_sprite(self):
         if self._default_sprite is not None:
@@ -131,59 +565,324 @@ class ImageCharacter:
             surf, arm_color, (cx + 20, body_top + 10, 12, 40), border_radius=5
         )
 
-        self._default_sprite = surf
-        return surf
+        self._default_sprite = self._finalize(surf)
+        return self._default_sprite
 
 
 class AnimatedCharacter(ImageCharacter):
-    def __init__(self, image_dir="images", width=200, height=280, frame_delay=100):
-        super().__init__(image_dir, width, height)
+    ANIMATION_DIRS = {
+        "idle": "idle",
+        "walk": "walk",
+        "sit": "sit",
+        "sleep": "sleep",
+        "happy": "happy",
+        "surprise": "surprise",
+    }
+
+    def __init__(
+        self,
+        image_dir="images",
+        width=200,
+        height=280,
+        frame_delay=100,
+        use_cache=True,
+        lazy=False,
+        memory_budget=32 * 1024 * 1024,
+        use_pack=True,
+        stream_threshold=None,
+        stream_ahead=8,
+        one_shot=None,
+        palettes=None,
+        variant_budget=16 * 1024 * 1024,
+    ):
+        """
+        帧数超过 stream_threshold 的动画改为流式播放：
+        只提前解码当前帧之后的 stream_ahead 帧，不整段放进内存。
+        one_shot: 只播放一次的状态 -> 播完后切换到的状态（None 表示停在最后一帧），
+        其余状态循环播放
+        """
         self.frame_delay = frame_delay
+        self.one_shot = one_shot or {}
         self.current_frame = 0
-        self.last_update = 0
+        # 动画时钟：当前状态和进入它的时间，帧序号由经过的时间算出
+        self.clock_state = None
+        self.clock_start = 0
+        self.clock_time = 0
+        self._timelines = {}  # 状态 -> (各帧时长, Timeline)
         self.animations = {}
+        self.stream_threshold = stream_threshold
+        self.stream_ahead = stream_ahead
+        self.streams = {}
+        super().__init__(
+            image_dir,
+            width,
+            height,
+            use_cache,
+            lazy,
+            memory_budget,
+            use_pack,
+            palettes,
+            variant_budget,
+        )
+
+    def load_images(self):
+        super().load_images()
         self.load_animations()
 
     def load_animations(self):
-        animation_dirs = {
-            "idle": "idle",
-            "walk": "walk",
-            "sit": "sit",
-            "sleep": "sleep",
-            "happy": "happy",
-            "surprise": "surprise",
-        }
+        keys = []
+        for state in self.ANIMATION_DIRS:
+            filepaths = self._scan_source(("anim", state))
+            if not filepaths:
+                filepaths = self._pack_sources(("anim", state))
+            if filepaths:
+                self.sources[("anim", state)] = filepaths
+                if self._should_stream(filepaths):
+                    self.streams[state] = FrameStream(
+                        self, filepaths, self.stream_ahead
+                    )
+                else:
+                    keys.append(("anim", state))
 
-        for state, dirname in animation_dirs.items():
-            anim_dir = os.path.join(self.image_dir, dirname)
-            if os.path.exists(anim_dir) and os.path.isdir(anim_dir):
-                frames = []
-                for filename in sorted(os.listdir(anim_dir)):
-                    if filename.lower().endswith((".png", ".jpg", ".jpeg", ".gif")):
-                        filepath = os.path.join(anim_dir, filename)
-                        try:
-                            image = pygame.image.load(filepath)
-                            image = self._scale_keep_ratio(image)
-                            frames.append(image)
-                        except Exception as e:
-                            print(f"Failed to load animation frame {filename}: {e}")
-
-                if frames:
-                    self.animations[state] = frames
-                    print(f"Loaded animation: {dirname} ({len(frames)} frames)")
+        if not self.lazy:
+            # 所有状态的帧一起提交给线程池
+            self._load_states(keys)
 
-    def get_sprite(self, state, current_time=None):
-        if state in self.animations:
-            if current_time is not None:
-                if current_time - self.last_update > self.frame_delay:
-                    self.current_frame = (self.current_frame + 1) % len(
-                        self.animations[state]
+    def set_palette(self, name):
+        super().set_palette(name)
+        # 流式播放缓冲区里的帧是按原来的配色解码的
+        for stream in self.streams.values():
+            stream.reset()
+
+    def _submit_stream_frame(self, filepath):
+        """
+        提交流式播放的一帧，返回转换好格式的 SpriteFrame 或 Future。
+        流式播放的帧每一圈都要重新取，不读写磁盘缓存，主线程上不做文件读写；
+        有配色时换色也在线程池里做，不放进各状态共用的变体缓存
+        """
+        pool = get_decode_pool()
+        palette = self.palettes.get(self.palette)
+        frames = self._pack_frames(filepath)
+        if frames is None:
+            if palette is None:
+                return pool.submit(decode_frames, filepath, self.width, self.height)
+            return pool.submit(
+                decode_recolored, filepath, self.width, self.height, palette
+            )
+        if palette is None:
+            return self._finalize_frame(frames[0])
+        # 资源包命中时复制出 RGBA 像素交给线程池换色
+        frame = frames[0]
+        decoded = DecodedImage(
+            pygame.image.tobytes(frame.surface, "RGBA"),
+            frame.surface.get_size(),
+            frame.offset,
+            frame.size,
+            frame.duration,
+        )
+        return pool.submit(recolor_decoded, [decoded], palette)
+
+    def _finish_stream_frame(self, filepath, future):
+        """在主线程取出流式播放一帧的解码结果"""
+        frames = self._finish_frames(filepath, future, store=False)
+        return self._finalize_frame(frames[0])
+
+    def is_ready(self, state):
+        ready = super().is_ready(state)
+        if state in self.streams:
+            # 流式播放的状态不经过懒加载，解码出第一帧之前显示的还是默认精灵；
+            # 这里同时提交解码，还没开始播放的角色（调整大小时新建的）也能就绪
+            index = self.current_frame if state == self.clock_state else 0
+            return self.streams[state].frame(index) is not None
+        return ready
+
+    def _should_stream(self, filepaths):
+        threshold = self.stream_threshold
+        return threshold is not None and len(filepaths) > threshold
+
+    def stream_underruns(self):
+        """各个流式动画解码跟不上、重复显示上一帧的次数"""
+        return {state: stream.underruns for state, stream in self.streams.items()}
+
+    def reload_files(self, changed):
+        # 流式播放的状态只需要换掉文件列表，之后按新文件解码
+        rest = []
+        for path in changed:
+            keys = self._source_keys(path)
+            streamed = [
+                key for key in keys if key[0] == "anim" and key[1] in self.streams
+            ]
+            for key in streamed:
+                filepaths = self._scan_source(key)
+                self._set_source(key, filepaths)
+                if filepaths:
+                    self.streams[key[1]] = FrameStream(
+                        self, filepaths, self.stream_ahead
                     )
-                    self.last_update = current_time
-            return self.animations[state][self.current_frame]
+                else:
+                    del self.streams[key[1]]
+            if len(streamed) < len(keys):
+                rest.append(path)
+        super().reload_files(rest)
+
+    def _list_frames(self, anim_dir):
+        return [
+            os.path.join(anim_dir, filename)
+            for filename in sorted(os.listdir(anim_dir))
+            if filename.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+
+    def _frames_of(self, key):
+        if key[0] == "anim":
+            return self.animations.get(key[1], [])
+        return super()._frames_of(key)
+
+    def _source_keys(self, filepath):
+        keys = super()._source_keys(filepath)
+        directory, filename = os.path.split(os.path.abspath(filepath))
+        name = os.path.splitext(filename)[0]
+        for state, dirname in self.ANIMATION_DIRS.items():
+            if directory == os.path.abspath(os.path.join(self.image_dir, dirname)):
+                keys.append(("anim", state))
+            elif directory == os.path.abspath(self.image_dir) and name in (
+                state,
+                state + SHEET_SUFFIX,
+            ):
+                # walk.gif、walk.png（APNG）、walk_sheet.png / walk_sheet.json
+                keys.append(("anim", state))
+        return keys
+
+    def _scan_source(self, key):
+        """
+        列出某个状态现在的动画来源：按序号命名的图片目录，
+        没有目录时查找 GIF、精灵表或 APNG 单文件动画
+        """
+        if key[0] == "anim":
+            anim_dir = os.path.join(self.image_dir, self.ANIMATION_DIRS[key[1]])
+            if os.path.isdir(anim_dir):
+                return self._list_frames(anim_dir)
+            filepath = find_animation_file(self.image_dir, key[1])
+            return [filepath] if filepath else []
+        return super()._scan_source(key)
+
+    def _install(self, key, frames):
+        if key[0] == "anim":
+            self._uninstall(key)
+            self.animations[key[1]] = self._pack_state(frames)
+        else:
+            super()._install(key, frames)
+
+    def _uninstall(self, key):
+        if key[0] == "anim":
+            if key[1] in self.animations:
+                self.variants.discard(self.animations.pop(key[1]))
+        else:
+            super()._uninstall(key)
+
+    def _state_key(self, state):
+        if state in self.streams:
+            # 流式播放的状态不经过懒加载
+            return None
+        key = ("anim", state)
+        if key in self.sources:
+            return key
+        return super()._state_key(state)
+
+    def _atlas_frames(self):
+        frames = super()._atlas_frames()
+        for state, state_frames in self.animations.items():
+            for i, frame in enumerate(state_frames):
+                frames[("anim", state, i)] = frame
+        return frames
+
+    def _use_atlas_regions(self):
+        super()._use_atlas_regions()
+        for state, frames in self.animations.items():
+            self.animations[state] = [
+                self.atlas.region(("anim", state, i)) for i in range(len(frames))
+            ]
+
+    def _finalize_loaded(self):
+        super()._finalize_loaded()
+        for state, frames in self.animations.items():
+            self.animations[state] = self._pack_state(frames)
+
+    def finalize_sprites(self, colorkey=None):
+        super().finalize_sprites(colorkey)
+        for stream in self.streams.values():
+            stream.reset()
+
+    def get_sprite(self, state, current_time=None):
+        self._request_state(state)
+        elapsed = self._advance_clock(state, current_time)
+        timeline = self._timeline(state)
+        if timeline is None:
+            return self._recolor(self._static_sprite(state))
+
+        self.current_frame = timeline.frame_at(elapsed)
+        if state in self.streams:
+            # 流式播放的帧在线程池里已经换好色
+            frame = self.streams[state].frame(self.current_frame)
+            if frame is not None:
+                return frame
+            return self._recolor(self._static_sprite(state))
+        # 整个状态的帧一起换色，之后切换帧时直接取
+        return self._recolor(self.animations[state])[self.current_frame]
+
+    def _advance_clock(self, state, current_time):
+        """换了状态时重新开始计时，返回进入当前状态以来的时间（毫秒）"""
+        if current_time is None:
+            current_time = self.clock_time
+        if state != self.clock_state:
+            self.clock_state = state
+            self.clock_start = current_time
+        self.clock_time = current_time
+        return current_time - self.clock_start
+
+    def _timeline(self, state):
+        """
+        该状态的时间轴，各帧时长变了（加载、热重载）时重新生成。
+        按时长而不是帧列表本身识别，状态被淘汰后不会因为这里的引用留在内存里
+        """
+        if state in self.streams:
+            durations = (self.frame_delay,) * len(self.streams[state])
+        elif state in self.animations:
+            durations = tuple(self._delay_of(f) for f in self.animations[state])
+        else:
+            return None
+
+        cached = self._timelines.get(state)
+        if cached is None or cached[0] != durations:
+            loop = state not in self.one_shot
+            timeline = Timeline(list(durations), loop, self.one_shot.get(state))
+            cached = self._timelines[state] = (durations, timeline)
+        return cached[1]
+
+    def _delay_of(self, frame):
+        """GIF、APNG 和精灵表的帧带有自己的时长，其余帧使用 frame_delay"""
+        return frame.duration or self.frame_delay
+
+    def next_frame_time(self, state):
+        """该状态下一帧的切换时间，静态图片和播完的一次性动画返回 None"""
+        deadline = super().next_frame_time(state)
+        timeline = self._timeline(state)
+        if timeline is not None and state == self.clock_state:
+            change = timeline.next_change(self.clock_time - self.clock_start)
+            if change is not None:
+                change += self.clock_start
+                deadline = change if deadline is None else min(deadline, change)
+        return deadline
 
-        return super().get_sprite(state)
+    def next_state(self, state, current_time):
+        """一次性动画播完、需要切换到下一个状态时返回该状态，否则返回 None"""
+        timeline = self._timeline(state)
+        if timeline is None or state != self.clock_state:
+            return None
+        if timeline.finished(current_time - self.clock_start):
+            return timeline.next_state
+        return None
 
     def reset_animation(self):
+        """下一次 get_sprite() 从第一帧重新开始播放"""
         self.current_frame = 0
-        self.last_update = 0
+        self.clock_state = None
@@ -0,0 +1,105 @@
+"""
+并行图片解码
+在线程池里用 Pillow 解码、缩放、裁剪图片（Pillow 解码和缩放时会释放 GIL），
+主线程只负责把结果包装成 pygame surface。
+解码后的图片保存在分辨率金字塔里，换尺寸时直接从内存重新采样
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from animation_source import is_sheet, read_frames
+from image_pyramid import covers, get_pyramid_store
+
+# 缩放算法名写进磁盘缓存的键，换算法后旧缓存自动失效
+SCALE_ALGORITHM = "PIL.pyramid.LANCZOS.rg3"
+
+_pool = None
+
+
+class DecodedImage:
+    """工作线程的解码结果：裁掉透明边后的 RGBA 像素和它在画布中的偏移"""
+
+    __slots__ = ("pixels", "size", "offset", "canvas_size", "duration")
+
+    def __init__(self, pixels, size, offset, canvas_size, duration=None):
+        self.pixels = pixels
+        self.size = size
+        self.offset = offset
+        self.canvas_size = canvas_size
+        self.duration = duration
+
+
+def scale_keep_ratio(image, width, height, resample=Image.LANCZOS):
+    """
+    缩放 Pillow 图片，保持宽高比放进 width×height 的画布（水平居中、底部对齐），
+    并裁掉透明边，返回 DecodedImage
+    """
+    image = image.convert("RGBA")
+    orig_w, orig_h = image.size
+    ratio = min(width / orig_w, height / orig_h)
+    new_w = max(1, int(orig_w * ratio))
+    new_h = max(1, int(orig_h * ratio))
+    # reducing_gap 先用整数倍缩小，再做 LANCZOS，大图缩放快很多
+    scaled = image.resize((new_w, new_h), resample, reducing_gap=3.0)
+
+    bbox = scaled.getchannel("A").getbbox() or (0, 0, 1, 1)
+    trimmed = scaled.crop(bbox)
+
+    x = (width - new_w) // 2 + bbox[0]
+    y = height - new_h + bbox[1]
+    return DecodedImage(trimmed.tobytes(), trimmed.size, (x, y), (width, height))
+
+
+def decode_frames(filepath, width, height):
+    """
+    在工作线程中执行：返回文件中每一帧缩放后的 DecodedImage（静态图片只有一帧）。
+    从金字塔中不小于目标尺寸的最近一级缩放，第一次用到时才解码文件
+    """
+    decoded = []
+    for pyramid, duration in get_pyramid_store().get_frames(filepath, width, height):
+        image = scale_keep_ratio(pyramid.level_for(width, height), width, height)
+        image.duration = duration
+        decoded.append(image)
+    return decoded
+
+
+def decode_preview(filepath, width, height):
+    """
+    在工作线程中执行：快速解码文件的第一帧作为预览，完整质量的帧加载完之前先显示它。
+    JPEG 用 draft() 直接按缩小的尺寸解码，其余格式解码后用 reduce() 整数倍缩小，
+    再用 BILINEAR 缩放。不经过金字塔，也不写缓存
+    """
+    with Image.open(filepath) as image:
+        if is_sheet(filepath):
+            image = read_frames(image, filepath)[0][0]
+        else:
+            image.draft("RGB", (width, height))
+            image = image.convert("RGBA")
+    factor = 1
+    w, h = image.size
+    while covers((w // (factor * 2) or 1, h // (factor * 2) or 1), width, height):
+        factor *= 2
+    if factor > 1:
+        image = image.reduce(factor)
+    return scale_keep_ratio(image, width, height, Image.BILINEAR)
+
+
+def get_decode_pool():
+    """进程内共享的解码线程池，线程数默认等于 CPU 核数"""
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1, thread_name_prefix="decode"
+        )
+    return _pool
+
+
+def set_decode_workers(max_workers):
+    """调整线程池大小（用于测试不同核数下的效果）"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+    _pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="decode")
@@ -0,0 +1,143 @@
+"""
+图片分辨率金字塔
+每个源文件只解码一次，保存逐级减半的缩小版本；
+调整大小时从不小于目标尺寸的最近一级重新采样，不再读取、解码文件
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from animation_source import is_sheet, read_frames, sheet_manifest_path
+
+# 最小一级的短边不小于这个像素数
+MIN_LEVEL_SIZE = 32
+
+
+def covers(size, width, height):
+    """按比例缩放进 width×height 时，size 大小的图片是否不需要放大"""
+    return min(width / size[0], height / size[1]) <= 1
+
+
+class ImagePyramid:
+    def __init__(self, image, max_size):
+        """
+        只保留能覆盖 max_size 的最小一级及以下各级：
+        更大的层级对缩放质量没有帮助，只占内存
+        """
+        image = image.convert("RGBA")
+        w, h = image.size
+        factor = 1
+        while covers((w // (factor * 2) or 1, h // (factor * 2) or 1), *max_size):
+            factor *= 2
+        # reduce() 是整数倍的盒式缩小，比一次性 LANCZOS 快得多
+        top = image.reduce(factor) if factor > 1 else image
+        self.is_source = factor == 1
+        self.levels = [top]
+        while min(self.levels[-1].size) >= MIN_LEVEL_SIZE * 2:
+            self.levels.append(self.levels[-1].reduce(2))
+
+    def covers(self, width, height):
+        """能否不经放大地缩放到 width×height（保留了原图时总是可以）"""
+        return self.is_source or covers(self.levels[0].size, width, height)
+
+    def level_for(self, width, height):
+        """不小于目标尺寸的最小一级"""
+        for level in reversed(self.levels):
+            if covers(level.size, width, height):
+                return level
+        return self.levels[0]
+
+    @property
+    def nbytes(self):
+        return sum(level.width * level.height * 4 for level in self.levels)
+
+
+class PyramidStore:
+    def __init__(self, max_size=(400, 560), max_bytes=64 * 1024 * 1024):
+        """
+        max_size: 预期的最大精灵尺寸，金字塔最高一级只保留到能覆盖它为止；
+        请求更大的尺寸时重新解码文件。
+        所有金字塔的总大小超过 max_bytes 时淘汰最久没用的。
+        """
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        # 绝对路径 -> (文件签名, [(每一帧的金字塔, 时长)])
+        self._pyramids = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.decodes = 0
+
+    def get_frames(self, filepath, width, height):
+        """
+        返回文件中每一帧的 (金字塔, 时长)，静态图片只有一帧；
+        没有、源文件已改变或最高一级不够大时重新解码文件。
+        可以在多个工作线程中同时调用
+        """
+        path = os.path.abspath(filepath)
+        signature = _signature(path)
+        with self._lock:
+            entry = self._pyramids.get(path)
+            if (
+                entry is not None
+                and entry[0] == signature
+                and all(pyramid.covers(width, height) for pyramid, _ in entry[1])
+            ):
+                self._pyramids.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+
+        max_size = (max(self.max_size[0], width), max(self.max_size[1], height))
+        with Image.open(path) as image:
+            frames = [
+                (ImagePyramid(frame, max_size), duration)
+                for frame, duration in read_frames(image, path)
+            ]
+
+        with self._lock:
+            old = self._pyramids.pop(path, None)
+            if old is not None:
+                self.bytes_used -= _nbytes(old[1])
+            self._pyramids[path] = (signature, frames)
+            self.bytes_used += _nbytes(frames)
+            self.decodes += 1
+            while self.bytes_used > self.max_bytes and len(self._pyramids) > 1:
+                _, (_, evicted) = self._pyramids.popitem(last=False)
+                self.bytes_used -= _nbytes(evicted)
+        return frames
+
+    def clear(self):
+        with self._lock:
+            self._pyramids.clear()
+            self.bytes_used = 0
+
+
+def _signature(path):
+    """文件的修改时间和大小；精灵表还要算上网格描述文件的修改时间"""
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if is_sheet(path):
+        signature += (os.stat(sheet_manifest_path(path)).st_mtime_ns,)
+    return signature
+
+
+def _nbytes(frames):
+    return sum(pyramid.nbytes for pyramid, _ in frames)
+
+
+_pyramid_store = None
+_pyramid_store_lock = threading.Lock()
+
+
+def get_pyramid_store():
+    """进程内共享的金字塔缓存，不同尺寸的角色共用（解码线程里也会调用）"""
+    global _pyramid_store
+    with _pyramid_store_lock:
+        if _pyramid_store is None:
+            _pyramid_store = PyramidStore()
+    return _pyramid_store
@@ -0,0 +1,286 @@
+"""
+换色
+不必为每种配色都准备一套图片：按颜色查找表把指定的颜色换成另一种颜色，
+或者把某段色相范围内的颜色整体转动色相。一个状态的所有帧拼在一起，用 NumPy 一次处理完，
+色相换算只对图里出现过的不同颜色做一次
+"""
+
+import sys
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from image_decoder import DecodedImage, decode_frames
+from sprite_atlas import SpriteFrame
+from state_loader import frame_bytes
+
+
+class Palette:
+    def __init__(self, colors=None, hue_shifts=(), min_saturation=0.15):
+        """
+        colors:         {(r, g, b): (r, g, b)}，精确匹配的颜色替换，换过的颜色不再转动色相
+        hue_shifts:     [(起始色相, 结束色相, 转动角度)]，单位为度；起始大于结束时跨过 0 度
+        min_saturation: 饱和度低于它的像素（黑白灰、高光）不转动色相
+        """
+        colors = colors or {}
+        # 颜色打包成 0xRRGGBB 排好序，查找时用二分
+        sources = np.array([_pack(c) for c in colors], dtype=np.uint32)
+        targets = np.array([_pack(c) for c in colors.values()], dtype=np.uint32)
+        order = np.argsort(sources)
+        self.sources = sources[order]
+        self.targets = targets[order]
+        self.hue_shifts = [
+            (start / 360, end / 360, shift / 360) for start, end, shift in hue_shifts
+        ]
+        self.min_saturation = min_saturation
+
+    def lookup(self, colors):
+        """
+        colors: 打包成 0xRRGGBB 的 uint32 数组（一般是一张图里出现过的不同颜色），
+        返回换色后的颜色，形式相同
+        """
+        colors = colors.copy()
+        hit = np.zeros(len(colors), dtype=bool)
+        if len(self.sources):
+            index = np.searchsorted(self.sources, colors)
+            index[index == len(self.sources)] = 0
+            hit = self.sources[index] == colors
+            colors[hit] = self.targets[index[hit]]
+        if self.hue_shifts:
+            self._shift_hues(colors, ~hit)
+        return colors
+
+    def _shift_hues(self, colors, allowed):
+        rgb = np.stack([colors >> 16 & 255, colors >> 8 & 255, colors & 255], axis=1)
+        h, s, v = _rgb_to_hsv(rgb.astype(np.float32) / 255)
+        colorful = allowed & (s >= self.min_saturation)
+        moved = np.zeros(len(h), dtype=bool)
+        for start, end, shift in self.hue_shifts:
+            if start <= end:
+                in_range = (h >= start) & (h <= end)
+            else:
+                in_range = (h >= start) | (h <= end)
+            # 每种颜色只转一次，范围重叠时以前面的为准
+            in_range &= colorful & ~moved
+            h[in_range] = (h[in_range] + shift) % 1.0
+            moved |= in_range
+        if moved.any():
+            # 只改写转过色相的颜色，其余颜色不经过 HSV 往返，保持原样
+            shifted = (_hsv_to_rgb(h[moved], s[moved], v[moved]) * 255 + 0.5).astype(
+                np.uint32
+            )
+            colors[moved] = shifted[:, 0] << 16 | shifted[:, 1] << 8 | shifted[:, 2]
+
+
+def _pack(color):
+    r, g, b = color[:3]
+    return r << 16 | g << 8 | b
+
+
+def _rgb_to_hsv(rgb):
+    """(N, 3) 的 0~1 浮点 RGB 转成 H、S、V 三个数组，和 colorsys 的定义相同"""
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    v = rgb.max(axis=1)
+    delta = v - rgb.min(axis=1)
+    s = np.divide(delta, v, out=np.zeros_like(v), where=v > 0)
+    safe = np.where(delta > 0, delta, 1)
+    h = np.where(
+        v == r,
+        (g - b) / safe,
+        np.where(v == g, 2 + (b - r) / safe, 4 + (r - g) / safe),
+    )
+    h = np.where(delta > 0, h / 6 % 1.0, 0)
+    return h.astype(np.float32), s, v
+
+
+def _hsv_to_rgb(h, s, v):
+    i = np.floor(h * 6).astype(np.int32) % 6
+    f = h * 6 - np.floor(h * 6)
+    p = v * (1 - s)
+    q = v * (1 - s * f)
+    t = v * (1 - s * (1 - f))
+    choices = [
+        np.stack(channels, axis=1)
+        for channels in (
+            (v, t, p),
+            (q, v, p),
+            (p, v, t),
+            (p, q, v),
+            (t, p, v),
+            (v, p, q),
+        )
+    ]
+    return np.choose(i[:, None], choices)
+
+
+def _repack(pixels, shifts, new_shifts):
+    """把 uint32 像素的 R、G、B 三个字节从 shifts 的位置挪到 new_shifts 的位置"""
+    result = np.zeros_like(pixels)
+    for shift, new_shift in zip(shifts, new_shifts):
+        result |= (pixels >> shift & 255) << new_shift
+    return result
+
+
+def _copy_32bit(surface):
+    """复制一份 32 位的 surface，pixels2d 只能直接访问这种格式"""
+    if surface.get_bytesize() == 4:
+        return surface.copy()
+    copy = pygame.Surface(surface.get_size(), 0, 32)
+    copy.blit(surface, (0, 0))
+    return copy
+
+
+def _recolor_pixels(pixels, shifts, alpha_mask, palette, colorkey=None):
+    """
+    原地换色：pixels 是 uint32 像素数组，shifts 是 R、G、B 在其中的位置。
+    先找出出现过的不同颜色，只对这些颜色查表、转色相，再按查找表一次写回；
+    有 alpha 时跳过全透明的像素，否则跳过 colorkey。返回是否有像素改变
+    """
+    colors = _repack(pixels, shifts, (16, 8, 0))
+    if alpha_mask:
+        selected = np.flatnonzero(pixels & alpha_mask)
+    elif colorkey is not None:
+        selected = np.flatnonzero(colors != _pack(colorkey))
+    else:
+        selected = np.arange(len(pixels))
+
+    # 查找表：出现过的颜色 -> 换色后的颜色
+    palette_colors, inverse = np.unique(colors[selected], return_inverse=True)
+    mapped = palette.lookup(palette_colors)
+    changed = mapped != palette_colors
+    if not changed.any():
+        return False
+    native = _repack(mapped, (16, 8, 0), shifts)
+    hit = changed[inverse]
+    index = selected[hit]
+    pixels[index] = pixels[index] & alpha_mask | native[inverse[hit]]
+    return True
+
+
+def recolor_frames(frames, palette, colorkey=None):
+    """
+    返回换色后的帧（复制一份，不修改原来的 surface），所有帧的像素拼在一起只处理一次。
+    用 colorkey 预合成的帧跳过 colorkey 颜色
+    """
+    surfaces = [_copy_32bit(frame.surface) for frame in frames]
+    # 同一个状态的帧格式相同（同一批解码、转换出来的）
+    shifts = surfaces[0].get_shifts()[:3]
+    alpha_mask = surfaces[0].get_masks()[3]
+    views = [pygame.surfarray.pixels2d(surface) for surface in surfaces]
+    pixels = np.concatenate([view.reshape(-1) for view in views])
+
+    if _recolor_pixels(pixels, shifts, alpha_mask, palette, colorkey):
+        start = 0
+        for view in views:
+            end = start + view.size
+            view[...] = pixels[start:end].reshape(view.shape)
+            start = end
+    # 释放对 surface 像素的引用，解除锁定
+    del views
+
+    return [
+        SpriteFrame(surface, frame.offset, frame.size, frame.duration)
+        for frame, surface in zip(frames, surfaces)
+    ]
+
+
+# RGBA 字节按本机字节序读成 uint32 后各通道的位置
+if sys.byteorder == "little":
+    _RGBA_SHIFTS, _RGBA_ALPHA = (0, 8, 16), 0xFF000000
+else:
+    _RGBA_SHIFTS, _RGBA_ALPHA = (24, 16, 8), 0xFF
+
+
+def recolor_decoded(images, palette):
+    """
+    在工作线程中执行：给解码结果（DecodedImage 列表）换色，返回新的 DecodedImage 列表。
+    只用 NumPy 处理 RGBA 字节，不碰 pygame surface
+    """
+    arrays = [np.frombuffer(image.pixels, dtype=np.uint32) for image in images]
+    pixels = np.concatenate(arrays)
+    _recolor_pixels(pixels, _RGBA_SHIFTS, _RGBA_ALPHA, palette)
+    recolored = []
+    start = 0
+    for image, array in zip(images, arrays):
+        end = start + len(array)
+        recolored.append(
+            DecodedImage(
+                pixels[start:end].tobytes(),
+                image.size,
+                image.offset,
+                image.canvas_size,
+                image.duration,
+            )
+        )
+        start = end
+    return recolored
+
+
+def decode_recolored(filepath, width, height, palette):
+    """在工作线程中执行：decode_frames() 之后接着换色"""
+    return recolor_decoded(decode_frames(filepath, width, height), palette)
+
+
+class VariantCache:
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        """
+        换色后的帧按 (配色名, 原来的帧) 缓存，用到时才生成；
+        换色后的帧总大小超过 max_bytes 时淘汰最久没用的一组（一组是一个状态的全部帧），
+        最近用到的一组总是保留。原来的帧被卸载时用 discard() 一起删掉。
+        流式播放的帧不经过这里，在线程池里换色（见 recolor_decoded）
+        """
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self._entries = OrderedDict()  # key -> (原来的帧, 换色后的帧, 字节数)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, palette, frames, colorkey=None):
+        """
+        frames 是一个 SpriteFrame 或者一个状态的帧列表，返回同样形式的换色结果。
+        按对象本身识别原来的帧：帧重新加载、转换格式之后会生成新的变体，
+        旧的变体不再被用到，慢慢被淘汰
+        """
+        key = (name, id(frames))
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is frames:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        if isinstance(frames, SpriteFrame):
+            recolored = recolor_frames([frames], palette, colorkey)[0]
+            size = frame_bytes(recolored)
+        else:
+            recolored = recolor_frames(frames, palette, colorkey)
+            size = sum(frame_bytes(frame) for frame in recolored)
+        self._pop(key)
+        self._entries[key] = (frames, recolored, size)
+        self.bytes_used += size
+        while self.bytes_used > self.max_bytes and len(self._entries) > 1:
+            self._pop(next(iter(self._entries)))
+        return recolored
+
+    def discard(self, frames):
+        """删掉由 frames 换色得到的所有变体（这些帧被卸载或换掉时）"""
+        for key in [key for key, entry in self._entries.items() if entry[0] is frames]:
+            self._pop(key)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= entry[2]
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
+
+# 洛天依的灰蓝色（发色、衣服）大约在 200~240 度，转到别的色相
+PALETTES = {
+    "樱花": Palette(hue_shifts=[(180, 260, 110)]),
+    "薄荷": Palette(hue_shifts=[(180, 260, -70)]),
+    "暮紫": Palette(hue_shifts=[(180, 260, 50)]),
+}
@@ -0,0 +1,134 @@
+"""
+精灵图集
+把每一帧裁剪到不透明区域，再把所有状态、所有帧打包进一张大 surface，
+每帧只保存图集中的子区域和绘制偏移
+"""
+
+import math
+
+import pygame
+
+
+class SpriteFrame:
+    """
+    精灵的一帧：实际需要绘制的像素，以及它在完整画布（width×height）中的偏移。
+    duration 是动画文件里记录的这一帧的时长（毫秒），None 表示使用默认帧间隔
+    """
+
+    __slots__ = ("surface", "offset", "size", "duration", "_mask")
+
+    def __init__(self, surface, offset=(0, 0), size=None, duration=None):
+        self.surface = surface
+        self.offset = offset
+        self.size = size if size is not None else surface.get_size()
+        self.duration = duration
+        self._mask = None
+
+    @property
+    def mask(self):
+        """不透明像素的掩码，第一次点击检测时生成，之后跟着这一帧缓存（换尺寸时帧会重建）"""
+        if self._mask is None:
+            self._mask = pygame.mask.from_surface(self.surface)
+        return self._mask
+
+    def hit_test(self, blit_pos, point):
+        """point 是否落在这一帧不透明的像素上，blit_pos 是 surface 左上角的位置"""
+        x = point[0] - blit_pos[0]
+        y = point[1] - blit_pos[1]
+        width, height = self.surface.get_size()
+        if not (0 <= x < width and 0 <= y < height):
+            return False
+        return bool(self.mask.get_at((x, y)))
+
+    def get_rect(self, topleft=(0, 0)):
+        """该帧不透明区域在屏幕上的位置"""
+        return pygame.Rect(
+            (topleft[0] + self.offset[0], topleft[1] + self.offset[1]),
+            self.surface.get_size(),
+        )
+
+
+def trim_frame(surface):
+    """裁掉四周的透明像素，返回 SpriteFrame"""
+    rect = surface.get_bounding_rect()
+    if rect.width == 0 or rect.height == 0:
+        rect = pygame.Rect(0, 0, 1, 1)
+    trimmed = surface.subsurface(rect).copy()
+    return SpriteFrame(trimmed, rect.topleft, surface.get_size())
+
+
+class SpriteAtlas:
+    def __init__(self, frames, padding=1):
+        """
+        frames: {key: SpriteFrame}，key 一般是 (state, 帧序号)。
+        使用货架（shelf）算法：按高度从高到低排列，一行放满再换下一行。
+        """
+        self.padding = padding
+        self.rects = {}
+        self.offsets = {}
+        self.sizes = {}
+        self.durations = {}
+        self.surface = self._pack(frames)
+
+    def _pack(self, frames):
+        if not frames:
+            return pygame.Surface((1, 1), pygame.SRCALPHA)
+
+        pad = self.padding
+        items = sorted(
+            frames.items(), key=lambda item: item[1].surface.get_height(), reverse=True
+        )
+        widths = [f.surface.get_width() + pad for _, f in items]
+        area = sum(
+            (f.surface.get_width() + pad) * (f.surface.get_height() + pad)
+            for _, f in items
+        )
+
+        # 在最宽一帧和所有帧并排之间试几种图集宽度，取总面积最小的排法
+        candidates = {max(widths), sum(widths), max(max(widths), int(math.sqrt(area)))}
+        step = max(1, (sum(widths) - max(widths)) // 16)
+        candidates.update(range(max(widths), sum(widths), step))
+        best = None
+        for limit in candidates:
+            rects, atlas_width, height = self._layout(items, limit)
+            if best is None or atlas_width * height < best[0] * best[1]:
+                best = (atlas_width, height, rects)
+
+        atlas_width, height, rects = best
+        surface = pygame.Surface((atlas_width, height), pygame.SRCALPHA)
+        for key, frame in items:
+            self.rects[key] = rects[key]
+            self.offsets[key] = frame.offset
+            self.sizes[key] = frame.size
+            self.durations[key] = frame.duration
+            surface.blit(frame.surface, rects[key])
+        return surface
+
+    def _layout(self, items, limit):
+        """货架排列：按顺序从左往右放，超过 limit 宽度就换到下一行"""
+        pad = self.padding
+        rects = {}
+        x = y = shelf_height = used_width = 0
+        for key, frame in items:
+            w, h = frame.surface.get_size()
+            if x > 0 and x + w + pad > limit:
+                x = 0
+                y += shelf_height
+                shelf_height = 0
+            rects[key] = pygame.Rect(x, y, w, h)
+            x += w + pad
+            used_width = max(used_width, x)
+            shelf_height = max(shelf_height, h + pad)
+        return rects, used_width, y + shelf_height
+
+    def region(self, key):
+        """返回图集中某一帧的 SpriteFrame（子 surface，不复制像素）"""
+        return SpriteFrame(
+            self.surface.subsurface(self.rects[key]),
+            self.offsets[key],
+            self.sizes[key],
+            self.durations[key],
+        )
+
+    def keys(self):
+        return self.rects.keys()
@@ -0,0 +1,195 @@
+"""
+缩放后精灵的磁盘缓存
+按 (源文件路径, 修改时间, 文件大小, 目标宽高, 缩放算法) 保存缩放、裁剪后的 RGBA 像素，
+下次启动或调整大小时直接 mmap 进 surface，不再解码 PNG、重新缩放
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+
+import pygame
+
+from sprite_atlas import SpriteFrame
+
+# 文件头：魔数、版本、源文件 mtime_ns、源文件大小、像素宽高、偏移、画布宽高、路径长度
+_HEADER = struct.Struct("<4sIqqIIiiIII")
+_MAGIC = b"LTYS"
+_VERSION = 1
+
+
+def default_cache_dir():
+    """Windows 放在 %LOCALAPPDATA%，其他平台放在 $XDG_CACHE_HOME 或 ~/.cache"""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "luotianyi_pet", "sprites")
+
+
+class SpriteCache:
+    def __init__(self, cache_dir=None, max_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._disk_bytes = None  # 磁盘缓存的总大小，prune() 或第一次写入时统计
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.enabled = True
+        except OSError as e:
+            print(f"Sprite cache disabled: {e}")
+            self.enabled = False
+        if self.enabled:
+            self.prune()
+
+    def _entry_path(self, filepath, width, height, algorithm):
+        source = os.path.abspath(filepath)
+        digest = hashlib.sha1(
+            f"{source}|{width}x{height}|{algorithm}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".rgba")
+
+    def load(self, filepath, width, height, algorithm):
+        """命中时返回 SpriteFrame，源文件变化或没有缓存时返回 None"""
+        if not self.enabled:
+            return None
+        entry = self._entry_path(filepath, width, height, algorithm)
+        try:
+            stat = os.stat(filepath)
+            with open(entry, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        header = self._read_header(data)
+        if header is None or header[2:4] != (stat.st_mtime_ns, stat.st_size):
+            # 源文件已经改变，缓存作废
+            data.close()
+            self._remove(entry)
+            self.misses += 1
+            return None
+
+        _, _, _, _, w, h, ox, oy, canvas_w, canvas_h, path_len = header
+        start = _HEADER.size + path_len
+        # frombuffer 直接引用 mmap 的内存，surface 存活期间映射保持有效
+        surface = pygame.image.frombuffer(
+            memoryview(data)[start : start + w * h * 4], (w, h), "RGBA"
+        )
+        self._touch(entry)
+        self.hits += 1
+        return SpriteFrame(surface, (ox, oy), (canvas_w, canvas_h))
+
+    def store(self, filepath, width, height, algorithm, frame):
+        if not self.enabled:
+            return
+        entry = self._entry_path(filepath, width, height, algorithm)
+        source = os.path.abspath(filepath).encode("utf-8")
+        try:
+            stat = os.stat(filepath)
+            w, h = frame.surface.get_size()
+            header = _HEADER.pack(
+                _MAGIC,
+                _VERSION,
+                stat.st_mtime_ns,
+                stat.st_size,
+                w,
+                h,
+                frame.offset[0],
+                frame.offset[1],
+                frame.size[0],
+                frame.size[1],
+                len(source),
+            )
+            pixels = pygame.image.tobytes(frame.surface, "RGBA")
+            # 先写临时文件再改名，避免读到写了一半的缓存
+            tmp = entry + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(header)
+                f.write(source)
+                f.write(pixels)
+            os.replace(tmp, entry)
+        except OSError as e:
+            print(f"Failed to write sprite cache for {filepath}: {e}")
+            return
+        # 记着总大小，只有超过上限时才扫描目录（覆盖旧条目时会多算，扫描时纠正）
+        if self._disk_bytes is not None:
+            self._disk_bytes += len(header) + len(source) + len(pixels)
+        if self._disk_bytes is None or self._disk_bytes > self.max_bytes:
+            self._evict()
+
+    def _read_header(self, data):
+        if len(data) < _HEADER.size:
+            return None
+        header = _HEADER.unpack_from(data)
+        if header[0] != _MAGIC or header[1] != _VERSION:
+            return None
+        w, h, path_len = header[4], header[5], header[10]
+        if len(data) < _HEADER.size + path_len + w * h * 4:
+            return None
+        return header
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".rgba"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _touch(self, entry):
+        # 用缓存文件的 mtime 记录最近使用时间
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+    def _remove(self, entry):
+        try:
+            os.remove(entry)
+        except OSError:
+            # Windows 下仍被映射的文件无法删除，下次再清理
+            pass
+
+    def _evict(self):
+        """总大小超过上限时，删除最久没有使用的条目"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+        self._disk_bytes = total
+
+    def prune(self):
+        """删除源文件已经不存在的条目，顺便统计剩下条目的总大小"""
+        total = 0
+        for _, size, path in self._entries():
+            try:
+                with open(path, "rb") as f:
+                    header = f.read(_HEADER.size)
+                    if len(header) < _HEADER.size:
+                        raise ValueError("truncated")
+                    fields = _HEADER.unpack(header)
+                    source = f.read(fields[10]).decode("utf-8")
+            except (OSError, ValueError, struct.error):
+                self._remove(path)
+                continue
+            if not os.path.exists(source):
+                self._remove(path)
+                continue
+            total += size
+        self._disk_bytes = total
+
+
+_sprite_cache = None
+
+
+def get_sprite_cache():
+    """进程内共享的精灵缓存"""
+    global _sprite_cache
+    if _sprite_cache is None:
+        _sprite_cache = SpriteCache()
+    return _sprite_cache
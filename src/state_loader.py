@@ -0,0 +1,139 @@
+"""
+按状态懒加载精灵
+某个状态第一次被 get_sprite() 用到时才交给线程池解码，加载完成前显示快速预览或默认精灵；
+已加载的状态按最近使用顺序排列，超出内存预算时淘汰最久没用的状态
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class StateLoader:
+    def __init__(self, character, memory_budget=32 * 1024 * 1024):
+        """
+        character 需要提供：
+          sources                       {key: [文件路径]}
+          _submit_frames(filepaths)     返回每个文件的帧列表（缓存命中）或 Future
+          _collect_frames(key, items)   在主线程取出解码结果，返回成功加载的帧
+          _install(key, frames)         把帧放进 images / animations
+          _uninstall(key)               从 images / animations 中移除
+          _wants_preview(key)           当前状态是否先解码一个快速预览
+          _set_preview(key, item)       换上（item 为 None 时去掉）预览
+        """
+        self.character = character
+        self.memory_budget = memory_budget
+        self.loaded = OrderedDict()  # key -> 占用字节数，按最近使用排序
+        self.pending = {}  # key -> [帧列表或 Future]
+        self.previews = {}  # key -> 预览的 Future
+        self.current = None
+        self.bytes_used = 0
+
+        # 统计信息
+        self.loads = 0
+        self.prefetches = 0
+        self.evictions = 0
+
+    def request(self, key):
+        """get_sprite() 用到某个状态：标记为最近使用，还没加载就开始加载"""
+        self.current = key
+        if key in self.loaded:
+            self.loaded.move_to_end(key)
+        elif key not in self.pending:
+            # 只给马上要显示的状态做预览，预加载的状态不多花解码时间
+            self._start(key, preview=self.character._wants_preview(key))
+
+    def prefetch(self, keys):
+        """
+        按可能性从高到低预加载接下来的状态，
+        连同当前状态一起放不进内存预算时就停止
+        """
+        budget = self.memory_budget - self.loaded.get(self.current, 0)
+        for key in keys:
+            if key is None or key == self.current:
+                continue
+            cost = self.loaded.get(key) or self.estimate(key)
+            if cost > budget:
+                break
+            budget -= cost
+            if key in self.loaded:
+                self.loaded.move_to_end(key)
+            elif key not in self.pending:
+                self._start(key)
+                self.prefetches += 1
+
+    def estimate(self, key):
+        """按完整画布估计一个状态占用的内存（裁剪后只会更小）"""
+        width, height = self.character.width, self.character.height
+        return len(self.character.sources.get(key, ())) * width * height * 4
+
+    def discard(self, key):
+        """文件列表已经改变，丢弃还在解码的旧结果"""
+        self.pending.pop(key, None)
+        self.previews.pop(key, None)
+        self.character._set_preview(key, None)
+
+    def update(self, key, frames):
+        """热重载换上新的帧后重新计算占用的内存"""
+        self.bytes_used -= self.loaded.pop(key, 0)
+        if frames:
+            self.loaded[key] = sum(frame_bytes(frame) for frame in frames)
+            self.bytes_used += self.loaded[key]
+            self._evict()
+
+    def is_loading(self, key):
+        return key in self.pending
+
+    def poll(self):
+        """在主线程调用：把已经全部解码完成的状态装进角色，还在解码的先换上预览"""
+        for key in [key for key, items in self.pending.items() if self._ready(items)]:
+            items = self.pending.pop(key)
+            frames = self.character._collect_frames(key, items)
+            self.previews.pop(key, None)
+            self.character._set_preview(key, None)
+            if not frames:
+                # 全部加载失败，不再重试，继续使用默认精灵
+                self.character.sources.pop(key, None)
+                continue
+            self.character._install(key, frames)
+            self.loaded[key] = sum(frame_bytes(frame) for frame in frames)
+            self.bytes_used += self.loaded[key]
+            self.loads += 1
+            self._evict()
+
+        for key in [key for key, future in self.previews.items() if future.done()]:
+            future = self.previews.pop(key)
+            try:
+                self.character._set_preview(key, future)
+            except Exception as e:
+                # 预览失败不影响完整加载
+                print(f"Failed to load preview: {e}")
+
+    def _start(self, key, preview=False):
+        if key not in self.character.sources:
+            return
+        sources = self.character.sources[key]
+        if not preview:
+            self.pending[key] = self.character._submit_frames(sources)
+            return
+        items, future = self.character._submit_frames(sources, preview=True)
+        self.pending[key] = items
+        if future is not None:
+            self.previews[key] = future
+
+    def _ready(self, items):
+        return all(not isinstance(item, Future) or item.done() for item in items)
+
+    def _evict(self):
+        """超出预算时淘汰最久没用的状态，当前显示的状态不淘汰"""
+        while self.bytes_used > self.memory_budget:
+            victim = next((key for key in self.loaded if key != self.current), None)
+            if victim is None:
+                break
+            self.bytes_used -= self.loaded.pop(victim)
+            self.character._uninstall(victim)
+            self.evictions += 1
+
+
+def frame_bytes(frame):
+    surface = frame.surface
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
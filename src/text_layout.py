@@ -0,0 +1,118 @@
+"""
+中英文混排换行
+每个字形的宽度只用 font.metrics 测量一次，用前缀和 + 二分查找断行位置，
+每行再用 font.size() 核对一次实际宽度。
+规则：行首不能是 "，。！？～" 等标点；英文单词和数字保持完整。
+"""
+
+from bisect import bisect_right
+from collections import OrderedDict
+
+# 不能出现在行首的标点，换行时跟随前一个字符
+NO_LINE_START = set("，。！？～、；：）》」』】…,.!?~;:)]}%")
+
+_cache = OrderedDict()
+_CACHE_SIZE = 256
+
+
+def _is_word_char(char):
+    return char.isascii() and (char.isalnum() or char in "'-_")
+
+
+def _split_units(text):
+    """把文本切成不可再分的断行单元，返回每个单元的结束下标"""
+    ends = []
+    i = 0
+    n = len(text)
+    while i < n:
+        j = i + 1
+        if _is_word_char(text[i]):
+            while j < n and _is_word_char(text[j]):
+                j += 1
+        # 行首禁用的标点黏在前一个单元上
+        while j < n and text[j] in NO_LINE_START:
+            j += 1
+        ends.append(j)
+        i = j
+    return ends
+
+
+def _advances(text, font):
+    advances = []
+    for metric in font.metrics(text):
+        advances.append(metric[4] if metric else 0)
+    return advances
+
+
+def _fits(line, font, max_width):
+    """
+    逐字相加的 advance 不含字距调整等，可能比实际渲染窄几个像素，
+    用 font.size() 量整行的实际宽度
+    """
+    return font.size(line.rstrip())[0] <= max_width
+
+
+def break_lines(text, font, max_width):
+    """
+    按 max_width 像素宽度换行，返回行列表（不做缓存）。
+    font 需要提供 metrics() 和 size()，pygame.font.Font 和 FontChain 都可以。
+    """
+    if not text:
+        return []
+
+    prefix = [0]
+    for advance in _advances(text, font):
+        prefix.append(prefix[-1] + advance)
+
+    unit_ends = _split_units(text)
+    unit_widths = [prefix[end] for end in unit_ends]
+
+    lines = []
+    start = 0
+    unit = 0
+    while unit < len(unit_ends):
+        # 跳过行首空白
+        while unit < len(unit_ends) and text[start:unit_ends[unit]].isspace():
+            start = unit_ends[unit]
+            unit += 1
+        if unit >= len(unit_ends):
+            break
+
+        # 最后一个能放进本行的单元
+        last = bisect_right(unit_widths, prefix[start] + max_width, lo=unit) - 1
+        # 实际渲染超宽时少放一个单元
+        while last >= unit:
+            if _fits(text[start : unit_ends[last]], font, max_width):
+                break
+            last -= 1
+        if last >= unit:
+            end = unit_ends[last]
+            unit = last + 1
+        else:
+            # 单个单元（长单词）就超宽了，只能在单元内部按字符断开
+            end = bisect_right(prefix, prefix[start] + max_width, lo=start + 1) - 1
+            while end > start + 1 and not _fits(text[start:end], font, max_width):
+                end -= 1
+            end = max(end, start + 1)
+            if end >= unit_ends[unit]:
+                unit += 1
+
+        lines.append(text[start:end].rstrip())
+        start = end
+
+    return lines
+
+
+def wrap_text(text, font, max_width):
+    """带缓存的 break_lines，按 (文本, 宽度, 字体) 记忆结果"""
+    key = (text, max_width, font)
+    lines = _cache.get(key)
+    if lines is not None:
+        _cache.move_to_end(key)
+        return lines
+
+    lines = tuple(break_lines(text, font, max_width))
+    _cache[key] = lines
+    if len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+    return lines
@@ -0,0 +1,207 @@
+"""
+矢量角色精灵的缓存
+按 (层名, 尺寸, 内容摘要) 把光栅化好的层裁到不透明区域后保存在内存和磁盘上，
+调整大小、重新启动时直接取出，不再重新绘制
+"""
+
+import os
+import struct
+import sys
+from collections import OrderedDict
+
+import pygame
+
+from .sprite_atlas import SpriteFrame
+
+# 文件头：魔数、版本、画布尺寸、不透明区域的位置和大小
+_HEADER = struct.Struct("<4sIIiiII")
+_MAGIC = b"LTYV"
+_VERSION = 3
+
+# 默认角色一种尺寸有 48 个不同的层，够放下三种大小
+MAXSIZE = 192
+
+
+def _pixel_order():
+    """
+    pygame 默认的带 alpha 格式在内存里的字节顺序。叠加各层时格式不同要逐像素换算，
+    格式相同时 blit 快二十多倍，所以层的像素直接按这个顺序保存。
+    小端机器上是 BGRA，Pillow 能直接输出；其他情况用 RGBA，建 surface 后再转换
+    """
+    masks = pygame.Surface((1, 1), pygame.SRCALPHA).get_masks()
+    if sys.byteorder == "little" and masks == (0xFF0000, 0xFF00, 0xFF, 0xFF000000):
+        return "BGRA"
+    return "RGBA"
+
+
+_PIXEL_ORDER = _pixel_order()
+
+
+def _layer_surface(pixels, size):
+    """按 _PIXEL_ORDER 排列的像素 -> 引用这些像素、pygame 默认格式的 surface"""
+    surface = pygame.image.frombuffer(pixels, size, _PIXEL_ORDER)
+    if _PIXEL_ORDER != "BGRA":
+        surface = surface.convert(pygame.Surface((1, 1), pygame.SRCALPHA))
+    return surface
+
+
+def trim_layer(image):
+    """
+    光栅化好的 RGBA 图片裁到不透明区域，返回 (SpriteFrame, 像素)。
+    Pillow 里裁剪后按 pygame 的字节顺序一次输出，surface 直接引用这份像素，
+    完整画布的像素不经过 Python，也不需要再转换格式
+    """
+    bbox = image.getbbox() or (0, 0, 1, 1)
+    cropped = image.crop(bbox)
+    pixels = cropped.tobytes("raw", _PIXEL_ORDER)
+    surface = _layer_surface(pixels, cropped.size)
+    return SpriteFrame(surface, bbox[:2], image.size), pixels
+
+
+def default_cache_dir():
+    """和缩放后精灵的磁盘缓存放在同一个目录下"""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "luotianyi_pet", "vector")
+
+
+class VectorSpriteCache:
+    def __init__(self, cache_dir=None, maxsize=MAXSIZE, max_bytes=32 * 1024 * 1024):
+        """
+        maxsize:   内存里最多保留的层数
+        max_bytes: 磁盘缓存的大小上限，超过时删除最久没有使用的条目
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._disk_bytes = None  # 磁盘缓存的总大小，第一次写入时统计
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.enabled = True
+        except OSError as e:
+            print(f"Vector sprite cache disabled: {e}")
+            self.enabled = False
+
+    def lookup(self, name, size, version):
+        """
+        返回缓存的层（裁剪过的 SpriteFrame，surface 还没有转换显示格式），
+        内存和磁盘都没有时返回 None
+        """
+        key = (name, size, version)
+        frame = self._cache.get(key)
+        if frame is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return frame
+
+        frame = self._load(name, size, version)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, frame)
+        return frame
+
+    def put(self, name, size, version, image):
+        """保存光栅化好的 size×size RGBA 图片，返回裁剪后的 SpriteFrame"""
+        frame, pixels = trim_layer(image)
+        self._store(name, size, version, frame, pixels)
+        self._remember((name, size, version), frame)
+        return frame
+
+    def _remember(self, key, frame):
+        self._cache[key] = frame
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def _entry_path(self, name, size, version):
+        return os.path.join(self.cache_dir, f"{name}_{size}_{version[:16]}.rgba")
+
+    def _load(self, name, size, version):
+        if not self.enabled:
+            return None
+        entry = self._entry_path(name, size, version)
+        try:
+            with open(entry, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        magic, file_version, canvas, x, y, w, h = _HEADER.unpack_from(data)
+        if (magic, file_version, canvas) != (_MAGIC, _VERSION, size):
+            return None
+        if len(data) != _HEADER.size + w * h * 4:
+            return None
+        self._touch(entry)
+        surface = _layer_surface(memoryview(data)[_HEADER.size :], (w, h))
+        return SpriteFrame(surface, (x, y), (size, size))
+
+    def _store(self, name, size, version, frame, pixels):
+        if not self.enabled:
+            return
+        entry = self._entry_path(name, size, version)
+        w, h = frame.surface.get_size()
+        try:
+            tmp = entry + ".tmp"
+            with open(tmp, "wb") as f:
+                x, y = frame.offset
+                f.write(_HEADER.pack(_MAGIC, _VERSION, size, x, y, w, h))
+                f.write(pixels)
+            os.replace(tmp, entry)
+        except OSError as e:
+            print(f"Failed to write vector sprite cache: {e}")
+            return
+        if self._disk_bytes is not None:
+            self._disk_bytes += _HEADER.size + w * h * 4
+        if self._disk_bytes is None or self._disk_bytes > self.max_bytes:
+            self._evict()
+
+    def _touch(self, entry):
+        # 用 mtime 记录最近使用时间
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """
+        总大小超过上限时，删除最久没有使用的条目；
+        绘图代码改过之后旧内容的层不会再被读到，最终也会从这里删掉
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".rgba"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        self._disk_bytes = total
+
+    def clear(self):
+        """只清空内存中的缓存（用于测试）"""
+        self._cache.clear()
+
+
+_vector_cache = None
+
+
+def get_vector_cache():
+    """进程内共享的矢量精灵缓存，调整大小时新建的角色也能用上"""
+    global _vector_cache
+    if _vector_cache is None:
+        _vector_cache = VectorSpriteCache()
+    return _vector_cache
@@ -0,0 +1,129 @@
+"""
+窗口平台抽象
+WindowsPlatform 通过 pywin32 实现透明置顶窗口；
+HeadlessPlatform 使用 SDL 的 dummy 显示驱动，只记录窗口操作，用于在 Linux 上运行和测试性能
+"""
+
+import os
+import sys
+
+import pygame
+
+
+class WindowsPlatform:
+    name = "windows"
+
+    def __init__(self):
+        import win32api
+        import win32con
+        import win32gui
+
+        self.win32api = win32api
+        self.win32con = win32con
+        self.win32gui = win32gui
+        self.hwnd = None
+        self.width = 0
+        self.height = 0
+        self.x = 0
+        self.y = 0
+
+    def screen_size(self):
+        return self.win32api.GetSystemMetrics(0), self.win32api.GetSystemMetrics(1)
+
+    def attach(self, width, height, colorkey, click_through=False):
+        """
+        在 display.set_mode() 之后调用：设置分层窗口样式和透明色。
+        click_through 为真时加上 WS_EX_TRANSPARENT，鼠标事件会穿透窗口。
+        """
+        self.hwnd = pygame.display.get_wm_info()["window"]
+        self.width = width
+        self.height = height
+
+        style = (
+            self.win32gui.GetWindowLong(self.hwnd, self.win32con.GWL_EXSTYLE)
+            | self.win32con.WS_EX_LAYERED
+        )
+        if click_through:
+            style |= self.win32con.WS_EX_TRANSPARENT
+        self.win32gui.SetWindowLong(self.hwnd, self.win32con.GWL_EXSTYLE, style)
+
+        self.win32gui.SetLayeredWindowAttributes(
+            self.hwnd,
+            self.win32api.RGB(*colorkey),
+            0,
+            self.win32con.LWA_COLORKEY,
+        )
+
+    def move_window(self, x, y):
+        """移动窗口并保持置顶"""
+        self.x = int(x)
+        self.y = int(y)
+        self.win32gui.SetWindowPos(
+            self.hwnd,
+            self.win32con.HWND_TOPMOST,
+            self.x,
+            self.y,
+            self.width,
+            self.height,
+            0,
+        )
+
+    def get_cursor_pos(self):
+        return self.win32api.GetCursorPos()
+
+
+class HeadlessPlatform:
+    name = "headless"
+
+    def __init__(self, screen_size=(1920, 1080)):
+        self._screen_size = screen_size
+        self.width = 0
+        self.height = 0
+        self.x = 0
+        self.y = 0
+        # 模拟的光标位置，测试时可以直接修改
+        self.cursor = (screen_size[0] // 2, screen_size[1] // 2)
+
+        # 记录下来的窗口操作
+        self.moves = []
+        self.style_changes = []
+        self.cursor_reads = []
+
+    def screen_size(self):
+        return self._screen_size
+
+    def attach(self, width, height, colorkey, click_through=False):
+        self.width = width
+        self.height = height
+        self.style_changes.append(
+            {
+                "size": (width, height),
+                "colorkey": tuple(colorkey),
+                "click_through": click_through,
+            }
+        )
+
+    def move_window(self, x, y):
+        self.x = int(x)
+        self.y = int(y)
+        self.moves.append((self.x, self.y))
+
+    def get_cursor_pos(self):
+        self.cursor_reads.append(self.cursor)
+        return self.cursor
+
+
+def create_platform():
+    """
+    按运行环境选择平台实现。
+    环境变量 LUOTIANYI_PLATFORM=headless 可以强制使用无窗口模式；
+    必须在 pygame.init() 之前调用，以便设置 SDL 的 dummy 显示驱动。
+    """
+    name = os.environ.get("LUOTIANYI_PLATFORM")
+    if name is None:
+        name = "windows" if sys.platform == "win32" else "headless"
+
+    if name == "headless":
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        return HeadlessPlatform()
+    return WindowsPlatform()
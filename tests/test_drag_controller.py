@@ -0,0 +1,95 @@
+"""拖拽合并：每帧一次光标读取、位置不变不移动、按刷新率限速、松开按键时强制移动"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import pytest
+
+from drag_controller import DragController
+
+
+class CountingBackend:
+    """不调用系统 API，只记录调用次数"""
+
+    def __init__(self):
+        self.cursor = (500, 500)
+        self.cursor_reads = 0
+        self.moves = []
+
+    def get_cursor_pos(self):
+        self.cursor_reads += 1
+        return self.cursor
+
+    def move_window(self, x, y):
+        self.moves.append((x, y))
+
+
+@pytest.fixture
+def backend():
+    return CountingBackend()
+
+
+@pytest.fixture
+def drag(backend):
+    drag = DragController(backend, refresh_rate=60)
+    drag.start(100, 100, 1920, 1080)
+    backend.cursor_reads = 0
+    return drag
+
+
+def drag_to(backend, drag, x, y, events=10):
+    """光标经过 events 个 MOUSEMOTION 到达 (x, y)"""
+    start_x, start_y = backend.cursor
+    for i in range(1, events + 1):
+        backend.cursor = (
+            start_x + (x - start_x) * i // events,
+            start_y + (y - start_y) * i // events,
+        )
+        drag.motion()
+
+
+def test_one_cursor_read_per_flush(backend, drag):
+    drag_to(backend, drag, 540, 520, events=133)
+    assert drag.flush(0) == (140, 120)
+    assert backend.cursor_reads == 1
+    assert backend.moves == [(140, 120)]
+
+    # 这一帧没有 MOUSEMOTION，不读光标
+    assert drag.flush(100) is None
+    assert backend.cursor_reads == 1
+
+
+def test_no_move_when_position_unchanged(backend, drag):
+    # 手抖：光标离开后又回到原处
+    drag_to(backend, drag, 503, 500)
+    drag_to(backend, drag, 500, 500)
+    assert drag.flush(0) is None
+    assert backend.cursor_reads == 1
+    assert backend.moves == []
+    assert drag.skipped_moves == 1
+
+
+def test_moves_limited_to_refresh_rate(backend, drag):
+    drag_to(backend, drag, 510, 500)
+    assert drag.flush(0) == (110, 100)
+
+    # 不到一个刷新间隔：不读光标也不移动，移动留到下一次
+    drag_to(backend, drag, 520, 500)
+    assert drag.flush(drag.min_interval - 1) is None
+    assert backend.cursor_reads == 1
+
+    assert drag.flush(drag.min_interval) == (120, 100)
+    assert backend.moves == [(110, 100), (120, 100)]
+
+
+def test_force_moves_on_button_release(backend, drag):
+    drag_to(backend, drag, 510, 500)
+    assert drag.flush(0) == (110, 100)
+
+    # 松开按键时不等刷新间隔，窗口停在光标最后的位置
+    drag_to(backend, drag, 530, 500)
+    assert drag.flush(1, force=True) == (130, 100)
+    assert backend.moves[-1] == (130, 100)
@@ -0,0 +1,123 @@
+"""流式动画循环播放：每一圈的帧都是转换好格式的 SpriteFrame，播放时不读写磁盘缓存"""
+
+import os
+import sys
+import time
+from concurrent.futures import Future
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import pygame
+import pytest
+from PIL import Image, ImageDraw
+
+import sprite_cache
+from image_character import AnimatedCharacter
+from sprite_atlas import SpriteFrame
+
+FRAMES = 12
+FRAME_DELAY = 100
+
+
+@pytest.fixture
+def character(tmp_path, monkeypatch):
+    anim_dir = tmp_path / "images" / "idle"
+    anim_dir.mkdir(parents=True)
+    for i in range(FRAMES):
+        img = Image.new("RGBA", (60, 84), (0, 0, 0, 0))
+        ImageDraw.Draw(img).ellipse([i, i, i + 30, i + 30], fill=(100, 120, 160, 255))
+        img.save(anim_dir / f"{i:03d}.png")
+
+    # 不动用户目录下的缓存
+    cache = sprite_cache.SpriteCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(sprite_cache, "_sprite_cache", cache)
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    character = AnimatedCharacter(
+        str(tmp_path / "images"),
+        60,
+        84,
+        frame_delay=FRAME_DELAY,
+        use_pack=False,
+        stream_threshold=5,
+        stream_ahead=3,
+    )
+    character.finalize_sprites()
+    yield character
+    pygame.quit()
+
+
+def wait_for_decodes(stream):
+    for item in list(stream._buffer.values()):
+        if isinstance(item, Future):
+            item.result()
+
+
+def play_two_loops(character):
+    stream = character.streams["idle"]
+    for t in range(0, 2 * FRAMES * FRAME_DELAY, FRAME_DELAY):
+        character.get_sprite("idle", t)
+        wait_for_decodes(stream)
+        frame = character.get_sprite("idle", t)
+        assert isinstance(frame, SpriteFrame)
+        assert frame is stream.frame(t // FRAME_DELAY)
+        yield frame
+
+
+def center(frame):
+    """帧经过裁剪，surface 中心落在圆里"""
+    width, height = frame.surface.get_size()
+    return frame.surface.get_at((width // 2, height // 2))
+
+
+def test_stream_plays_two_loops(character):
+    for _ in play_two_loops(character):
+        pass
+    # 流式播放的帧不经过磁盘缓存，主线程上没有文件读写
+    cache = character.sprite_cache
+    assert cache.hits == 0
+    assert os.listdir(cache.cache_dir) == []
+
+
+def test_stream_recolors_in_worker(character):
+    character.set_palette("樱花")
+    for frame in play_two_loops(character):
+        # 原来的灰蓝色转到了别的色相
+        r, g, b, a = center(frame)
+        assert r > b
+
+    character.set_palette(None)
+    for frame in play_two_loops(character):
+        r, g, b, a = center(frame)
+        assert b > r
+    # 流式播放的帧不占用各状态共用的变体缓存，里面只有第一帧解码完之前显示的占位精灵
+    placeholder = character._static_sprite("idle")
+    originals = [entry[0] for entry in character.variants._entries.values()]
+    assert all(original is placeholder for original in originals)
+
+
+def test_stream_ready_after_first_frame(character):
+    stream = character.streams["idle"]
+    placeholder = character._static_sprite("idle")
+    for _ in range(500):
+        ready = character.is_ready("idle")
+        frame = character.get_sprite("idle", 0)
+        # 就绪之后显示的是流式播放的帧，不再是占位精灵
+        if ready:
+            assert frame is not placeholder
+            assert frame is stream.frame(0)
+            return
+        time.sleep(0.01)
+    raise AssertionError("流式播放的第一帧没有解码出来")
+
+
+def test_stream_ready_without_playing(character):
+    # 调整大小时新建的角色还没开始播放，只轮询 is_ready() 也要能就绪
+    for _ in range(500):
+        if character.is_ready("idle"):
+            break
+        time.sleep(0.01)
+    assert character.streams["idle"].frame(0) is not None
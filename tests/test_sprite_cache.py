@@ -0,0 +1,44 @@
+"""磁盘精灵缓存：记着总大小，没有超过上限时写入不扫描目录"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import pygame
+
+from sprite_atlas import SpriteFrame
+from sprite_cache import SpriteCache
+
+ENTRY_PIXELS = 20 * 20 * 4
+
+
+def store_sources(cache, tmp_path, count, start=0):
+    frame = SpriteFrame(pygame.Surface((20, 20), pygame.SRCALPHA))
+    for i in range(start, start + count):
+        source = tmp_path / f"{i:03d}.png"
+        source.write_bytes(b"png")
+        cache.store(str(source), 20, 20, "lanczos", frame)
+
+
+def cache_size(cache):
+    return sum(size for _, size, _ in cache._entries())
+
+
+def test_store_scans_only_over_limit(tmp_path, monkeypatch):
+    cache = SpriteCache(str(tmp_path / "cache"), max_bytes=10 * (ENTRY_PIXELS + 200))
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or entries())
+
+    store_sources(cache, tmp_path, 5)
+    assert scans == []
+    assert cache._disk_bytes == cache_size(cache)
+
+    # 超过上限后删掉最久没用的条目，总大小回到上限以内
+    store_sources(cache, tmp_path, 20, start=5)
+    assert scans
+    assert cache_size(cache) <= cache.max_bytes
+    assert cache._disk_bytes == cache_size(cache)
@@ -0,0 +1,80 @@
+"""懒加载的内存预算：被淘汰的状态不能再被时间轴、换色变体等引用着留在内存里"""
+
+import gc
+import os
+import sys
+import time
+import weakref
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import pygame
+import pytest
+from PIL import Image, ImageDraw
+
+import sprite_cache
+from image_character import AnimatedCharacter
+
+STATES = ("walk", "idle", "happy")
+FRAMES = 8
+
+
+@pytest.fixture
+def character(tmp_path, monkeypatch):
+    for state in STATES:
+        anim_dir = tmp_path / "images" / state
+        anim_dir.mkdir(parents=True)
+        for i in range(FRAMES):
+            img = Image.new("RGBA", (60, 84), (0, 0, 0, 0))
+            ImageDraw.Draw(img).rectangle([i, i, 50, 80], fill=(100, 120, 160, 255))
+            img.save(anim_dir / f"{i:03d}.png")
+
+    # 不动用户目录下的缓存
+    cache = sprite_cache.SpriteCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(sprite_cache, "_sprite_cache", cache)
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    # 预算只够放下一个状态
+    character = AnimatedCharacter(
+        str(tmp_path / "images"),
+        60,
+        84,
+        lazy=True,
+        memory_budget=FRAMES * 60 * 84 * 4,
+        use_pack=False,
+    )
+    character.finalize_sprites()
+    yield character
+    pygame.quit()
+
+
+def show(character, state, palette=None):
+    """显示 state 直到它的帧加载完成，返回正在显示的帧"""
+    character.set_palette(palette)
+    for _ in range(500):
+        if character.is_ready(state):
+            return character.get_sprite(state, 0)
+        time.sleep(0.01)
+    raise AssertionError(f"{state} 没有加载完成")
+
+
+@pytest.mark.parametrize("palette", [None, "樱花"])
+def test_evicted_state_is_freed(character, palette):
+    show(character, "walk", palette)
+    page = weakref.ref(character.animations["walk"][0].surface.get_parent())
+    for state in STATES[1:]:
+        show(character, state, palette)
+
+    assert character.loader.evictions >= 2
+    assert "walk" not in character.animations
+    gc.collect()
+    assert page() is None
+    # 被淘汰的状态的变体也删掉了，剩下的都是还在内存里的状态
+    loaded = list(character.animations.values()) + list(character.images.values())
+    for entry in character.variants._entries.values():
+        assert any(entry[0] is frames for frames in loaded)
+    if palette is not None:
+        assert character.variants._entries